@@ -0,0 +1,162 @@
+"""All-pairs shortest distances over the arrays of a Frozen_graph.
+
+Sparse graphs run one Dijkstra per source. With several jobs the sources
+are split across a process pool; the CSR arrays and the result matrix
+live in shared memory, so workers attach to them instead of receiving a
+pickled graph per task and writing rows back through pipes. Dense graphs
+use Floyd-Warshall, done on whole rows (with NumPy when it is installed).
+Floyd-Warshall has no answer on a negative cycle, so graphs with negative
+weights always go through Dijkstra, which settles every vertex once.
+"""
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
+from math import inf
+from multiprocessing import shared_memory
+from typing import Literal
+
+from instrumentation import count
+from matrices import np
+
+Strategy = Literal["auto", "dijkstra", "floyd_warshall"]
+
+DENSE = 0.25
+PARALLEL_MIN_VERTICES = 300
+
+
+def shortest_distances(offsets, targets, weights, source: int) -> list[float]:
+    """Dijkstra from `source`. Every vertex is expanded once, as in the
+    original dedstar, so negative weights give the distances along the
+    settled order instead of looping on a negative cycle."""
+    distanses = [inf] * (len(offsets) - 1)
+    distanses[source] = 0.0
+    settled = bytearray(len(distanses))
+    heap = [(0.0, source)]
+    scanned = pushes = 0
+    while heap:
+        distance, current = heappop(heap)
+        if settled[current]:
+            continue
+        settled[current] = 1
+        scanned += offsets[current+1] - offsets[current]
+        for i in range(offsets[current], offsets[current+1]):
+            d = distance + weights[i]
+            child = targets[i]
+            if d < distanses[child]:
+                distanses[child] = d
+                if not settled[child]:
+                    heappush(heap, (d, child))
+                    pushes += 1
+    count("dijkstra.relaxations", scanned)
+    count("dijkstra.heap_pushes", pushes)
+    return distanses
+
+def direct_distances(frozen) -> list[list[float]]:
+    offsets, targets, weights = frozen.offsets, frozen.targets, frozen.weights
+    size = len(frozen)
+    matrix = [[inf] * size for _ in range(size)]
+    for start in range(size):
+        row = matrix[start]
+        row[start] = 0.0
+        for i in range(offsets[start], offsets[start+1]):
+            end = targets[i]
+            row[end] = min(row[end], weights[i])
+    return matrix
+
+def floyd_warshall(frozen) -> list[list[float]]:
+    matrix = direct_distances(frozen)
+    if np is not None:
+        matrix = np.array(matrix, dtype=float)
+        for k in range(len(matrix)):
+            np.minimum(matrix, matrix[:, k, None] + matrix[None, k, :], out=matrix)
+        return matrix.tolist()
+
+    for k, row_k in enumerate(matrix):
+        for i, row_i in enumerate(matrix):
+            through = row_i[k]
+            if through < inf:
+                matrix[i] = list(map(min, row_i, map(through.__add__, row_k)))
+    return matrix
+
+def dijkstra(frozen) -> list[list[float]]:
+    offsets, targets, weights = frozen.offsets, frozen.targets, frozen.weights
+    return [shortest_distances(offsets, targets, weights, source)
+            for source in range(len(frozen))]
+
+
+_shared = None
+
+def _attach(names: tuple[str, str], sizes: tuple[int, int]):
+    global _shared
+    size, n_entries = sizes
+    blocks = [shared_memory.SharedMemory(name) for name in names]
+    graph, result = (block.buf for block in blocks)
+    offsets = graph[:8*(size+1)].cast('q')
+    targets = graph[8*(size+1):8*(size+1+n_entries)].cast('q')
+    weights = graph[8*(size+1+n_entries):8*(size+1+2*n_entries)].cast('d')
+    _shared = blocks, offsets, targets, weights, result.cast('d')
+
+def _rows(sources: range):
+    _, offsets, targets, weights, result = _shared
+    size = len(offsets) - 1
+    for source in sources:
+        row = shortest_distances(offsets, targets, weights, source)
+        result[source*size:(source+1)*size] = array('d', row)
+
+def parallel_dijkstra(frozen, jobs: int) -> list[list[float]]:
+    size, n_entries = len(frozen), len(frozen.targets)
+    data = bytes(frozen.offsets) + bytes(frozen.targets) + bytes(frozen.weights)
+    # the segments outlive the process unless unlinked: they are released
+    # in `finally`, which a cancelled job still runs (see workers.Cancelled)
+    graph = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    try:
+        result = shared_memory.SharedMemory(create=True, size=max(8*size*size, 1))
+    except BaseException:
+        graph.close()
+        graph.unlink()
+        raise
+    pool = None
+    try:
+        graph.buf[:len(data)] = data
+        step = max(1, -(-size // (4*jobs)))
+        pool = ProcessPoolExecutor(jobs, initializer=_attach,
+                                   initargs=((graph.name, result.name),
+                                             (size, n_entries)))
+        list(pool.map(_rows, [range(i, min(i+step, size))
+                              for i in range(0, size, step)]))
+        view = result.buf.cast('d')
+        matrix = [view[i*size:(i+1)*size].tolist() for i in range(size)]
+        view.release()
+        return matrix
+    finally:
+        if pool is not None:
+            # on cancel the rows still queued are dropped, not computed
+            pool.shutdown(cancel_futures=True)
+        for block in graph, result:
+            block.close()
+            block.unlink()
+
+def all_pairs(frozen, jobs: int=None,
+              strategy: Strategy="auto") -> list[list[float]]:
+    """Distance matrix in the vertex order of `frozen`.
+
+    `auto` picks the NumPy Floyd-Warshall when more than a quarter of all
+    vertex pairs are joined by an edge, and Dijkstra from every source
+    otherwise; without NumPy the row-wise Floyd-Warshall is slower than
+    Dijkstra even on dense graphs, so it is only used when asked for.
+    Negative weights always use Dijkstra, whatever the strategy.
+    """
+    size = len(frozen)
+    if min(frozen.weights, default=0) < 0:
+        strategy = "dijkstra"
+    elif strategy == "auto":
+        dense = len(frozen.targets) > DENSE * size * size
+        strategy = "floyd_warshall" if dense and np is not None else "dijkstra"
+    if strategy == "floyd_warshall":
+        return floyd_warshall(frozen)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs > 1 and size >= PARALLEL_MIN_VERTICES:
+        return parallel_dijkstra(frozen, jobs)
+    return dijkstra(frozen)
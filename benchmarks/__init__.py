@@ -0,0 +1,10 @@
+"""Benchmarks, each run as `python -m benchmarks.<module>`; `suite` runs
+the algorithms together and compares runs."""
+from time import perf_counter
+
+
+def measure(function, *args) -> tuple[float, object]:
+    """Seconds taken by `function(*args)` and its result."""
+    begin = perf_counter()
+    result = function(*args)
+    return perf_counter() - begin, result
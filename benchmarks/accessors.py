@@ -0,0 +1,49 @@
+"""Micro-benchmarks of the Graph accessors against their uncached forms.
+
+    python -m benchmarks.accessors [vertices]
+"""
+import sys
+from timeit import timeit
+
+from benchmarks.generators import random_sparse
+from frozen_graph import Frozen_graph
+from my_graph import Graph
+
+
+def legacy_degree(graph: Graph) -> dict[str, int]:
+    result = dict()
+    for start in set(graph.edges.keys()):
+        result[start] = 0
+        for end in set(graph.edges[start].keys()):
+            result[start] += sum(graph.edges[start][end].values())
+    return result
+
+def main(n: int):
+    graph = random_sparse(n)
+    start = next(iter(graph.vertices()))
+    end = next(iter(graph.list_adjacent(start)))
+    cases = [
+        ("vertices", lambda: graph.vertices(),
+                     lambda: set(graph.edges.keys())),
+        ("list_adjacent", lambda: graph.list_adjacent(start),
+                          lambda: set(graph.edges[start].keys())),
+        ("weights", lambda: min(graph.weights(start, end)),
+                    lambda: min(set(graph.edges[start][end].keys()))),
+        ("min_weight", lambda: graph.min_weight(start, end),
+                       lambda: min(set(graph.edges[start][end].keys()))),
+        ("degree", lambda: graph.degree(), lambda: legacy_degree(graph)),
+        ("freeze", lambda: graph.freeze(), 
+                   lambda: Frozen_graph.from_edges(graph.edges)),
+    ]
+    print(f"{n} vertices, microseconds per call")
+    print(f"{'':>14} {'cached':>10} {'uncached':>10}")
+    for name, cached, uncached in cases:
+        cached()
+        number = 100 if name in ("degree", "freeze") else 10000
+        fast = timeit(cached, number=number) / number * 1e6
+        slow = timeit(uncached, number=number) / number * 1e6
+        print(f"{name:>14} {fast:10.2f} {slow:10.2f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 2000)
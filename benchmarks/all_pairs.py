@@ -0,0 +1,35 @@
+"""Scaling of the all-pairs engine with the number of worker processes.
+
+    python -m benchmarks.all_pairs [vertices] [max workers]
+"""
+import os
+import sys
+
+from all_pairs import all_pairs, dijkstra
+from benchmarks import measure
+from benchmarks.generators import random_sparse
+from matrices import np
+
+
+def main(n: int, max_jobs: int):
+    frozen = random_sparse(n).freeze()
+    print(f"{n} vertices, {len(frozen.targets)} edges, {os.cpu_count()} CPUs")
+    base, expected = measure(dijkstra, frozen)
+    print(f"{'sequential':>12} {base:8.3f}")
+    for jobs in range(1, max_jobs+1):
+        elapsed, result = measure(all_pairs, frozen, jobs, "dijkstra")
+        assert result == expected
+        print(f"{jobs:>4} workers {elapsed:8.3f} {base/elapsed:6.2f}x")
+
+    dense = random_sparse(min(n, 300), degree=min(n, 300)//2).freeze()
+    dense_dijkstra = measure(all_pairs, dense, 1, "dijkstra")[0]
+    print(f"dense {len(dense)} vertices: dijkstra {dense_dijkstra:.3f}", end='')
+    if np is not None:
+        print(f", floyd-warshall {measure(all_pairs, dense, 1, 'floyd_warshall')[0]:.3f}")
+    else:
+        print(", floyd-warshall skipped without NumPy")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(args[0] if args else 1000, args[1] if args[1:] else os.cpu_count() or 1)
@@ -0,0 +1,38 @@
+"""Round trip through the binary format and its load time against text.
+
+    python -m benchmarks.binary [vertices]
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks import measure
+from benchmarks.parsing import write_matrix
+from file_parcer import iter_rows
+from frozen_graph import Frozen_graph
+from my_graph import Graph
+
+
+def main(n: int):
+    with tempfile.TemporaryDirectory() as directory:
+        text = os.path.join(directory, "matrix.txt")
+        binary = os.path.join(directory, "matrix.gpg")
+        write_matrix(text, n)
+
+        parsed, graph = measure(lambda: Graph.from_weights(iter_rows(text)))
+        graph.save_binary(binary)
+        mapped, frozen = measure(Frozen_graph.load, binary)
+        thawed, loaded = measure(lambda: Graph.load_binary(binary).edges)
+        assert loaded == graph.edges
+        assert frozen.edges() == graph.freeze().edges()
+
+        print(f"{n} vertices, {len(frozen.targets)} edges, "\
+              +f"text {os.path.getsize(text)/2**20:.1f} MiB, "\
+              +f"binary {os.path.getsize(binary)/2**20:.1f} MiB")
+        print(f"{'text -> Graph':>24} {parsed:8.3f}")
+        print(f"{'binary -> Frozen_graph':>24} {mapped:8.3f}")
+        print(f"{'binary -> Graph dicts':>24} {thawed:8.3f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 2000)
@@ -0,0 +1,89 @@
+"""Sorting 10k small random graphs into isomorphism classes.
+
+The collection holds relabelled copies of random graphs in random order.
+The classifier is timed on all of it, with one and with every core; the
+pairwise check (every graph against one member of each class found so
+far with Graph.__eq__) only on the first `PAIRWISE` graphs, where both
+must give the same classes.
+
+    python -m benchmarks.classify [graphs]
+"""
+import os
+import sys
+from random import Random
+from time import perf_counter
+
+from benchmarks.generators import erdos_renyi
+from classification import classify
+from instrumentation import recorder
+from my_graph import Graph
+from result_cache import shared_cache
+
+GRAPHS = 10_000
+COPIES = 5
+PAIRWISE = 1000
+
+
+def collection(n_graphs: int, seed: int=0) -> list[Graph]:
+    rnd = Random(seed)
+    graphs = list()
+    for i in range(-(-n_graphs // COPIES)):
+        graph = erdos_renyi(rnd.randint(5, 9), 0.35, seed=i)
+        names = list(graph.vertices())
+        for _ in range(COPIES):
+            shuffled = names.copy()
+            rnd.shuffle(shuffled)
+            mapping = dict(zip(names, shuffled))
+            copy = Graph()
+            for vertex in shuffled:
+                copy.add_vertex(vertex)
+            for start in names:
+                for end in graph.list_adjacent(start):
+                    copy.set_edge(mapping[start], mapping[end], graph.edges[start][end])
+            graphs.append(copy)
+    rnd.shuffle(graphs)
+    return graphs[:n_graphs]
+
+def pairwise(graphs: list[Graph]) -> tuple[list[list[int]], int]:
+    classes = list()
+    calls = 0
+    for i, graph in enumerate(graphs):
+        for members in classes:
+            calls += 1
+            if graph == graphs[members[0]]:
+                members.append(i)
+                break
+        else:
+            classes.append([i])
+    return classes, calls
+
+def timed_classify(graphs: list[Graph], jobs: int) -> list[list[int]]:
+    shared_cache.clear()
+    recorder.clear()
+    begin = perf_counter()
+    classes = classify(graphs, jobs=jobs)
+    elapsed = perf_counter() - begin
+    print(f"{len(graphs):6} graphs, classify, {jobs:2} jobs: {elapsed:7.2f} s, "\
+          +f"{len(classes)} classes, {recorder.counters['classification.buckets']} "\
+          +f"buckets, {recorder.counters['classification.labels']} canonical labels")
+    return classes
+
+def main(n_graphs: int):
+    recorder.enabled = True
+    graphs = collection(n_graphs)
+    subset = graphs[:PAIRWISE]
+
+    shared_cache.clear()
+    begin = perf_counter()
+    expected, calls = pairwise(subset)
+    elapsed = perf_counter() - begin
+    print(f"{len(subset):6} graphs, pairwise __eq__: {elapsed:7.2f} s, "\
+          +f"{len(expected)} classes, {calls} comparisons")
+    assert timed_classify(subset, 1) == sorted(expected)
+
+    for jobs in sorted({1, os.cpu_count() or 1}):
+        timed_classify(graphs, jobs)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else GRAPHS)
@@ -0,0 +1,41 @@
+"""Heap Dijkstra against the previous linear-scan implementation.
+
+    python -m benchmarks.dedstar [sizes...]
+"""
+import sys
+from collections import defaultdict
+from functools import partial
+
+from benchmarks import measure
+from benchmarks.generators import random_sparse
+from my_graph import Graph
+
+
+def legacy_dedstar(graph: Graph, start: str) -> dict[str, float]:
+    distanses = defaultdict(partial(float, 'inf'))
+    distanses[start] = 0
+
+    to_visit = set(graph.vertices())
+    while to_visit:
+        current = min(to_visit, key=distanses.__getitem__)
+        to_visit.remove(current)
+        for child in graph.list_adjacent(current) & to_visit:
+            d = distanses[current] + min(graph.weights(current, child))
+            distanses[child] = min(distanses[child], d)
+    return distanses
+
+def main(sizes: list[int]):
+    print(f"{'vertices':>8} {'legacy':>10} {'heap':>10} {'speedup':>8} {'all pairs':>10}")
+    for n in sizes:
+        graph = random_sparse(n)
+        legacy, expected = measure(legacy_dedstar, graph, '0')
+        heap, result = measure(graph.dedstar, '0')
+        assert all(result[v] == expected[v] for v in graph.vertices())
+        all_pairs = "-"
+        if n <= 1000:
+            all_pairs = f"{measure(graph.all_distances)[0]:10.3f}"
+        print(f"{n:8} {legacy:10.3f} {heap:10.4f} {legacy/heap:8.1f} {all_pairs:>10}")
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [100, 1000, 10000])
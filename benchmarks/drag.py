@@ -0,0 +1,66 @@
+"""Cost of dragging a hub vertex.
+
+Times the edge geometry of a hub with many incident edges, then, when a
+display is available, feeds a burst of motion events to a Graph_canvas
+and reports how many redraws they were coalesced into.
+
+    python -m benchmarks.drag [edges]
+"""
+import sys
+import tkinter as tk
+from timeit import repeat
+from time import perf_counter
+
+from graph_canvas import Graph_canvas, Vertex, edge_geometry
+from my_graph import Graph
+
+EVENTS = 200
+
+
+def hub(n: int) -> Graph:
+    graph = Graph()
+    for i in range(1, n+1):
+        graph.add_edge("0", str(i), i)
+    return graph
+
+def geometry(n: int):
+    segments = [(200, 200, 200 + i % 50, 100 + i // 50) for i in range(n)]
+    best = min(repeat(lambda: edge_geometry(segments, Vertex.r),
+                      number=10, repeat=5)) / 10
+    print(f"edge geometry for {n} edges: {best*1000:.2f} ms")
+
+def drag(n: int):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"no display: {e}")
+        return
+    canvas = Graph_canvas(root, hub(n))
+    canvas.pack()
+    root.update()
+
+    redraws = 0
+    flush = canvas.flush
+    def counted():
+        nonlocal redraws
+        redraws += 1
+        flush()
+    canvas.flush = counted
+
+    x, y = canvas.to_screen(*canvas.vertices["0"].center)
+    canvas.event_generate("<Button-1>", x=int(x), y=int(y))
+    begin = perf_counter()
+    for i in range(EVENTS):
+        canvas.event_generate("<B1-Motion>", x=int(x) + i % 40, y=int(y),
+                              when="tail")
+    canvas.event_generate("<ButtonRelease-1>", when="tail")
+    root.update()
+    elapsed = perf_counter() - begin
+    print(f"{EVENTS} motion events: {redraws} redraws, {elapsed*1000:.1f} ms")
+    root.destroy()
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if sys.argv[1:] else 500
+    geometry(n)
+    drag(n)
@@ -0,0 +1,42 @@
+"""Memory and throughput of the dict-based Graph against Frozen_graph.
+
+    python -m benchmarks.frozen [vertices]
+"""
+import sys
+import tracemalloc
+
+from benchmarks import measure
+from benchmarks.generators import random_sparse
+
+
+def allocated(build) -> tuple[int, object]:
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def main(n: int):
+    dict_size, graph = allocated(lambda: random_sparse(n))
+    frozen_size, frozen = allocated(graph.freeze)
+    n_edges = len(frozen.targets)
+    print(f"{n} vertices, {n_edges} edges")
+    print(f"{'':>18} {'dict':>10} {'frozen':>10}")
+    print(f"{'bytes per edge':>18} {dict_size/n_edges:10.0f} {frozen_size/n_edges:10.0f}")
+
+    start = frozen.names[0]
+    checks = [
+        ("degree", (), ()),
+        ("dedstar", (start,), (start,)),
+    ]
+    if n <= 2000:
+        checks.append(("min_spanning_tree", (start,), (start,)))
+        checks.append(("reachability", (), ()))
+    for name, dict_args, frozen_args in checks:
+        slow = measure(getattr(graph, name), *dict_args)[0]
+        fast = measure(getattr(frozen, name), *frozen_args)[0]
+        print(f"{name:>18} {slow:10.4f} {fast:10.4f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 6000)
@@ -0,0 +1,150 @@
+"""Synthetic graphs for the benchmarks.
+
+Every generator returns an undirected graph stored as a Graph with both
+directions of each edge, vertices named "0" .. "n-1". Edges get random
+weights from 1 to `max_weight`, or weight 0 (as in adjacency matrices)
+when `max_weight` is None. `write_adjacency` and `write_weights` save a
+graph in the text formats read by file_parcer.
+"""
+from math import log
+from random import Random
+from typing import Callable, Iterable
+
+from my_graph import Graph
+
+
+def _graph(n: int, pairs: Iterable[tuple[int, int]], rnd: Random,
+           max_weight: int=None) -> Graph:
+    graph = Graph()
+    for vertex in range(n):
+        graph.add_vertex(str(vertex))
+    for start, end in pairs:
+        weight = rnd.randint(1, max_weight) if max_weight is not None else 0
+        graph.add_edge(str(start), str(end), weight=weight)
+        graph.add_edge(str(end), str(start), weight=weight)
+    return graph
+
+def random_sparse(n: int, degree: int=4,
+                  max_weight: int=100, seed: int=0) -> Graph:
+    rnd = Random(seed)
+    graph = Graph()
+    for vertex in range(n):
+        graph.add_vertex(str(vertex))
+    for start in range(n):
+        for end in rnd.sample(range(n), min(degree, n)):
+            weight = rnd.randint(1, max_weight)
+            graph.add_edge(str(start), str(end), weight=weight)
+            graph.add_edge(str(end), str(start), weight=weight)
+    return graph
+
+def erdos_renyi(n: int, p: float, max_weight: int=None, seed: int=0) -> Graph:
+    """G(n, p) without loops; pairs are skipped geometrically, so sparse
+    graphs take time proportional to their edges."""
+    rnd = Random(seed)
+
+    def pairs():
+        if p <= 0:
+            return
+        start, end = 1, -1
+        while start < n:
+            skip = 0 if p >= 1 else int(log(1 - rnd.random()) / log(1 - p))
+            end += 1 + skip
+            while end >= start and start < n:
+                end -= start
+                start += 1
+            if start < n:
+                yield start, end
+    return _graph(n, pairs(), rnd, max_weight)
+
+def barabasi_albert(n: int, m: int=2, max_weight: int=None, seed: int=0) -> Graph:
+    """Preferential attachment: every new vertex joins `m` distinct
+    existing ones chosen proportionally to their degree."""
+    rnd = Random(seed)
+    m = max(1, min(m, n - 1))
+    ends = list(range(m))
+    pairs = list()
+    for vertex in range(m, n):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rnd.choice(ends))
+        for target in chosen:
+            pairs.append((vertex, target))
+        ends.extend(chosen)
+        ends.extend([vertex] * m)
+    return _graph(n, pairs, rnd, max_weight)
+
+def random_regular(n: int, degree: int=3, max_weight: int=None, seed: int=0,
+                   attempts: int=100) -> Graph:
+    """Random pairing of vertex stubs in rounds: stubs that would make a
+    loop or a repeated edge are paired again among themselves, and the
+    whole pairing restarts if they cannot be."""
+    if n * degree % 2 or degree >= n:
+        raise ValueError(f"No {degree}-regular graph on {n} vertices")
+    rnd = Random(seed)
+
+    def suitable(pairs: set[tuple[int, int]], left: dict[int, int]) -> bool:
+        return not left or any(a != b and (min(a, b), max(a, b)) not in pairs
+                               for a in left for b in left)
+
+    for _ in range(attempts):
+        pairs = set()
+        stubs = [v for v in range(n) for _ in range(degree)]
+        while stubs:
+            left = dict()
+            rnd.shuffle(stubs)
+            for a, b in zip(stubs[::2], stubs[1::2]):
+                a, b = min(a, b), max(a, b)
+                if a != b and (a, b) not in pairs:
+                    pairs.add((a, b))
+                else:
+                    left[a] = left.get(a, 0) + 1
+                    left[b] = left.get(b, 0) + 1
+            if not suitable(pairs, left):
+                break
+            stubs = [v for v, count in left.items() for _ in range(count)]
+        else:
+            return _graph(n, sorted(pairs), rnd, max_weight)
+    raise ValueError(f"No simple pairing found in {attempts} attempts")
+
+def grid(rows: int, columns: int, max_weight: int=None, seed: int=0) -> Graph:
+    def pairs():
+        for i in range(rows):
+            for j in range(columns):
+                vertex = i*columns + j
+                if j + 1 < columns:
+                    yield vertex, vertex + 1
+                if i + 1 < rows:
+                    yield vertex, vertex + columns
+    return _graph(rows * columns, pairs(), Random(seed), max_weight)
+
+
+GENERATORS: dict[str, Callable[[int, int], Graph]] = {
+    "sparse": lambda n, seed: random_sparse(n, seed=seed),
+    "erdos_renyi": lambda n, seed: erdos_renyi(n, min(1.0, 8 / max(n, 1)),
+                                               max_weight=100, seed=seed),
+    "barabasi_albert": lambda n, seed: barabasi_albert(n, 4, max_weight=100, seed=seed),
+    "regular": lambda n, seed: random_regular(n + n % 2, 4, max_weight=100, seed=seed),
+    "grid": lambda n, seed: grid(round(n**0.5), round(n**0.5), max_weight=100, seed=seed),
+}
+
+
+def _write(graph: Graph, path: str, cell: Callable[[str, str], str]):
+    names = sorted(graph.vertices(), key=int)
+    with open(path, "w") as file:
+        print(len(names), file=file)
+        for start in names:
+            print(*(cell(start, end) for end in names), file=file)
+
+def write_adjacency(graph: Graph, path: str):
+    def count(start: str, end: str) -> str:
+        if end not in graph.edges[start]:
+            return "0"
+        return str(int(sum(graph.edges[start][end].values())))
+    _write(graph, path, count)
+
+def write_weights(graph: Graph, path: str):
+    def weight(start: str, end: str) -> str:
+        if end not in graph.edges[start]:
+            return "nan"
+        return str(graph.min_weight(start, end))
+    _write(graph, path, weight)
@@ -0,0 +1,33 @@
+"""Force-directed layout iterations per second.
+
+Each layout runs for a few seconds on random graphs of 1k, 10k and 50k
+vertices. Without NumPy repulsion is computed for all pairs, so only the
+smallest graph is measured.
+
+    python -m benchmarks.layout [seconds]
+"""
+import sys
+from time import perf_counter
+
+from benchmarks.generators import random_sparse
+from layout import Force_atlas, Fruchterman_reingold
+from matrices import np
+
+SIZES = (1000, 10000, 50000)
+
+
+def main(seconds: float):
+    sizes = SIZES if np is not None else SIZES[:1]
+    for n in sizes:
+        frozen = random_sparse(n, degree=2).freeze()
+        for layout in Fruchterman_reingold, Force_atlas:
+            engine = layout(frozen)
+            begin = perf_counter()
+            engine.run(seconds=seconds)
+            elapsed = perf_counter() - begin
+            print(f"{n:6} vertices {layout.__name__:>20}: "\
+                  +f"{engine.iteration / elapsed:8.2f} iterations/s")
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if sys.argv[1:] else 3.0)
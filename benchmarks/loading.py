@@ -0,0 +1,49 @@
+"""Building graphs from dense weight matrices.
+
+    python -m benchmarks.loading [vertices]
+"""
+import sys
+from math import isnan
+from random import Random
+
+from benchmarks import measure
+from frozen_graph import Frozen_graph
+from matrices import np
+from my_graph import Graph
+
+
+def legacy_from_weights(matrix: list[list[float]]) -> Graph:
+    graph = Graph()
+    for start, row in enumerate(matrix):
+        graph.add_vertex(str(start))
+        for end, value in enumerate(row):
+            if value is None or isnan(value):
+                continue
+            graph.add_edge(str(start), str(end), weight=value)
+    return graph
+
+def dense_weights(n: int, density: float=0.1, seed: int=0) -> list[list[float]]:
+    rnd = Random(seed)
+    return [[rnd.randint(1, 100) if rnd.random() < density else float('nan')
+             for _ in range(n)] for _ in range(n)]
+
+def main(n: int):
+    matrix = dense_weights(n)
+    print(f"{n}x{n} weight matrix")
+    print(f"{'legacy Graph.from_weights':>32} {measure(legacy_from_weights, matrix)[0]:8.3f}")
+    print(f"{'Graph.from_weights':>32} {measure(Graph.from_weights, matrix)[0]:8.3f}")
+    print(f"{'  + building the dicts':>32} "\
+          +f"{measure(lambda: Graph.from_weights(matrix).edges)[0]:8.3f}")
+    print(f"{'Frozen_graph.from_matrix':>32} {measure(Frozen_graph.from_matrix, matrix)[0]:8.3f}")
+    if np is not None:
+        array = np.array(matrix)
+        print(f"{'Frozen_graph.from_matrix (NumPy)':>32} "\
+              +f"{measure(Frozen_graph.from_matrix, array)[0]:8.3f}")
+        print(f"{'Graph.from_weights (NumPy)':>32} "\
+              +f"{measure(Graph.from_weights, array)[0]:8.3f}")
+        print(f"{'  + building the dicts':>32} "\
+              +f"{measure(lambda: Graph.from_weights(array).edges)[0]:8.3f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 2000)
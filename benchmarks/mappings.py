@@ -0,0 +1,89 @@
+"""Candidates explored to find a vertex mapping onto a relabelled copy.
+
+The graphs are random 3-regular ones, with random weights (which tell
+many vertices apart) and without (where only the search can). The copy
+renames every vertex to another one of the same degree, so each
+generator can find the mapping. `all_nicknames` and `correct_nicknames`
+are counted in tuples generated (discarded ones included) until one
+renames the graph into the copy, stopping at LIMIT, and are only run
+on the smallest graphs; the backtracking search is counted in
+candidate images tried, for the first mapping and for all of them.
+
+    python -m benchmarks.mappings [sizes...]
+"""
+import sys
+from collections import defaultdict
+from itertools import islice
+from random import Random
+from time import perf_counter
+
+from benchmarks.generators import random_regular
+from instrumentation import recorder
+from my_graph import Graph
+
+SIZES = (6, 8, 10, 50, 200, 1000)
+LIMIT = 10**6
+NICKNAMES_LIMIT = 8
+
+
+def relabelled(graph: Graph, seed: int=0) -> tuple[Graph, dict[str, str]]:
+    by_degree = defaultdict(list)
+    for vertex, degree in graph.degree().items():
+        by_degree[degree].append(vertex)
+    rnd = Random(seed)
+    mapping = dict()
+    for vertices in by_degree.values():
+        shuffled = vertices.copy()
+        rnd.shuffle(shuffled)
+        mapping.update(zip(vertices, shuffled))
+    other = Graph()
+    for start in graph.vertices():
+        for end in graph.list_adjacent(start):
+            other.set_edge(mapping[start], mapping[end], graph.edges[start][end])
+    return other, mapping
+
+def nickname_tries(graph: Graph, other: Graph, nicknames) -> str:
+    """Tuples generated until one turns `graph` into `other`."""
+    names = sorted(graph.vertices())
+    recorder.clear()
+    for tries, nickname in enumerate(nicknames, 1):
+        tries += recorder.counters["nicknames.discarded"]
+        if tries > LIMIT:
+            break
+        mapping = dict(zip(names, nickname))
+        if all(other.edges[mapping[start]].keys() == {mapping[end] for end in adjacent}
+               and all(other.edges[mapping[start]][mapping[end]] == edge
+                       for end, edge in adjacent.items())
+               for start, adjacent in graph.edges.items()):
+            return str(tries)
+    return f">{LIMIT}"
+
+def explored(graph: Graph, other: Graph, n_mappings: int=None) -> tuple[int, int, float]:
+    recorder.clear()
+    begin = perf_counter()
+    found = sum(1 for _ in islice(graph.mappings(other), n_mappings))
+    elapsed = perf_counter() - begin
+    return recorder.counters["mappings.candidates"], found, elapsed
+
+def main(sizes: list[int]):
+    recorder.enabled = True
+    print(f"{'vertices':>8} {'weights':>8} {'all_nicknames':>14} {'correct_nicknames':>18} "\
+          +f"{'first mapping':>14} {'time':>11} {'all mappings':>22} {'time':>11}")
+    for n in sizes:
+        for max_weight in 2, None:
+            graph = random_regular(n, 3, max_weight=max_weight)
+            other, _ = relabelled(graph)
+            brute = pruned = "-"
+            if n <= NICKNAMES_LIMIT:
+                brute = nickname_tries(graph, other, graph.all_nicknames())
+                pruned = nickname_tries(graph, other, graph.correct_nicknames())
+            first, _, elapsed = explored(graph, other, 1)
+            every, found, elapsed_all = explored(graph, other)
+            weights = "random" if max_weight else "none"
+            print(f"{n:8} {weights:>8} {brute:>14} {pruned:>18} {first:14} "\
+                  +f"{elapsed*1000:8.1f} ms {f'{every} ({found} found)':>22} "\
+                  +f"{elapsed_all*1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main(list(map(int, sys.argv[1:])) or SIZES)
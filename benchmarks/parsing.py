@@ -0,0 +1,71 @@
+"""Parsing matrix files: the previous per-token reader against iter_rows,
+the NumPy chunk parser and whole loads.
+
+    python -m benchmarks.parsing [vertices]
+"""
+import os
+import sys
+import tempfile
+from io import TextIOWrapper
+from random import Random
+
+from benchmarks import measure
+from exceptions import BadFile
+import file_parcer
+from file_parcer import iter_blocks, iter_rows, read_adjacency
+from matrices import np
+from my_graph import Graph
+
+
+def legacy_read_row(file: TextIOWrapper, n: int, n_parts: int) -> list[float]:
+    parts = file.readline().split()
+    if len(parts) != n_parts:
+        raise BadFile(f"Некорректная длинна строки {n}: "\
+                      +f"Ожидалось {n_parts}, получено {len(parts)}")
+    result = list()
+    for i, raw in enumerate(parts):
+        try:
+            parsed = float(raw)
+        except ValueError:
+            raise BadFile(f"Некорректный символ {i} строки {n}: {raw}")
+        else:
+            result.append(parsed)
+    return result
+
+def legacy_read_adjacency(path: str) -> list[list[float]]:
+    with open(path) as file:
+        size = int(file.readline())
+        return [legacy_read_row(file, i, size) for i in range(size)]
+
+def write_matrix(path: str, n: int, seed: int=0):
+    rnd = Random(seed)
+    with open(path, "w") as file:
+        print(n, file=file)
+        for _ in range(n):
+            print(*(rnd.choice(("nan", rnd.randint(1, 100))) for _ in range(n)), 
+                  file=file)
+
+def main(n: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "matrix.txt")
+        write_matrix(path, n)
+        size = os.path.getsize(path) / 2**20
+        print(f"{n}x{n} matrix, {size:.1f} MiB")
+        print(f"{'legacy':>26} {measure(legacy_read_adjacency, path)[0]:8.3f}")
+        print(f"{'read_adjacency':>26} {measure(read_adjacency, path)[0]:8.3f}")
+        print(f"{'iter_rows (streamed)':>26} "\
+              +f"{measure(lambda: sum(1 for _ in iter_rows(path)))[0]:8.3f}")
+        if np is not None:
+            print(f"{'iter_blocks':>26} "\
+                  +f"{measure(lambda: sum(1 for _ in iter_blocks(path)))[0]:8.3f}")
+            print(f"{'Graph.load':>26} {measure(Graph.load, path, 'weight')[0]:8.3f}")
+            file_parcer.np = None
+            try:
+                print(f"{'read_adjacency (no NumPy)':>26} "\
+                      +f"{measure(read_adjacency, path)[0]:8.3f}")
+            finally:
+                file_parcer.np = np
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 2000)
@@ -0,0 +1,41 @@
+"""Time to first frame of Graph_canvas for 10^3 - 10^5 edges.
+
+Every graph is opened in a fresh canvas and the clock stops once Tk has
+drawn it; the number of canvas items shows how much was materialised.
+Needs a display.
+
+    python -m benchmarks.render
+"""
+import tkinter as tk
+from time import perf_counter
+
+from benchmarks.generators import random_sparse
+from graph_canvas import Graph_canvas
+
+EDGES = (10**3, 10**4, 10**5)
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"no display: {e}")
+        return
+    for edges in EDGES:
+        # random_sparse adds both directions of `degree` edges per vertex
+        graph = random_sparse(edges // 8)
+        n_edges = sum(len(adjacent) for adjacent in graph.edges.values())
+        begin = perf_counter()
+        canvas = Graph_canvas(root, graph)
+        canvas.pack()
+        root.update()
+        elapsed = perf_counter() - begin
+        raster = "raster" if canvas.raster is not None else "items"
+        print(f"{n_edges:7} edges: first frame in {elapsed:6.2f} s, "\
+              +f"{len(canvas.find_all()):5} items, edges as {raster}")
+        canvas.destroy()
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Prim and Kruskal against the previous spanning tree scan.
+
+    python -m benchmarks.spanning_tree [vertices]
+"""
+import sys
+
+from benchmarks import measure
+from benchmarks.generators import random_sparse
+from my_graph import Graph
+from spanning_tree import kruskal, prim
+
+
+def legacy_min_spanning_tree(graph: Graph, start: str) -> float:
+    chosed = {start}
+    total = 0
+    while True:
+        vertex = None, None
+        min_weight = None
+        for begin in chosed:
+            for end in graph.list_adjacent(begin)-chosed:
+                weight = min(graph.weights(begin, end))
+                if min_weight is None or weight < min_weight:
+                    vertex = begin, end
+                    min_weight = weight
+        if min_weight is None:
+            return total
+        chosed.add(vertex[-1])
+        total += min_weight
+
+def main(n: int):
+    graph = random_sparse(n, degree=4)
+    frozen = graph.freeze()
+    print(f"{n} vertices, {len(frozen.targets)} edges")
+    totals = dict()
+    for name, algorithm in ("prim", prim), ("kruskal", kruskal):
+        elapsed, tree = measure(algorithm, frozen)
+        totals[name] = sum(weight for *_, weight in tree)
+        print(f"{name:>8} {elapsed:8.3f}")
+    if n <= 1000:
+        elapsed, totals["legacy"] = measure(legacy_min_spanning_tree, graph, '0')
+        print(f"{'legacy':>8} {elapsed:8.3f}")
+    assert len(set(totals.values())) == 1, totals
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 12500)
@@ -0,0 +1,84 @@
+"""Start-up time of the application.
+
+Imports of `main` are measured in a fresh interpreter with -X importtime
+(best of `repeat` runs); the slowest modules are listed and the modules
+that must only load on first use are checked. With a display, the time
+until the window has been drawn is measured as well. The exit status is
+1 when a threshold is exceeded or a deferred module is imported early.
+
+    python -m benchmarks.startup [--repeat 5] [--import-ms 100] [--window-ms 200]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("numpy", "my_graph", "graph_canvas", "widgets", "workers",
+            "concurrent.futures", "multiprocessing")
+WINDOW = """\
+from time import perf_counter
+begin = perf_counter()
+import main
+app = main.App()
+app.update()
+print(perf_counter() - begin)
+app.destroy()
+"""
+
+
+def import_times() -> dict[str, tuple[int, int]]:
+    """Self and cumulative microseconds of every module imported by main."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+    lines = [line.removeprefix("import time:").split("|")
+             for line in process.stderr.splitlines()
+             if line.startswith("import time:") and "self [us]" not in line]
+    # modules are listed after the ones they import; those of main are
+    # the indented lines right before it, the rest is interpreter start-up
+    times = dict()
+    for own, cumulative, name in reversed(lines):
+        if times and not name.startswith("  "):
+            break
+        times[name.strip()] = int(own), int(cumulative)
+    return times
+
+def window_time() -> float | None:
+    process = subprocess.run([sys.executable, "-c", WINDOW], cwd=ROOT,
+                             capture_output=True, text=True)
+    if process.returncode:
+        return None
+    return float(process.stdout)
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--import-ms", type=float, default=100.0)
+    parser.add_argument("--window-ms", type=float, default=200.0)
+    args = parser.parse_args(argv)
+
+    runs = [import_times() for _ in range(args.repeat)]
+    times = min(runs, key=lambda times: times["main"][1])
+    total = times["main"][1] / 1000
+    print(f"import main: {total:.1f} ms")
+    for name, (_, cumulative) in sorted(times.items(), key=lambda item: -item[1][1])[1:11]:
+        print(f"{cumulative/1000:10.1f} ms  {name}")
+    failed = total > args.import_ms
+
+    early = [name for name in DEFERRED if name in times]
+    if early:
+        print(f"imported at start-up: {', '.join(early)}")
+        failed = True
+
+    windows = [window_time() for _ in range(args.repeat)]
+    if None in windows:
+        print("window: no display")
+    else:
+        window = min(windows) * 1000
+        print(f"window drawn: {window:.1f} ms")
+        failed |= window > args.window_ms
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,173 @@
+"""Timings of loading and of every Graph algorithm on synthetic graphs.
+
+Each case has an untimed setup that builds fresh state (a graph without
+derived caches and an empty result cache), so repeats measure cold runs.
+Results go to a JSON file together with the commit and environment they
+were taken on; two such files can be compared to spot regressions, and
+the per-size entries give the scaling curves.
+
+    python -m benchmarks.suite [--sizes 100 1000] [--generators grid ...]
+                               [--repeat 5] [--output results.json]
+    python -m benchmarks.suite --compare old.json new.json
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from random import Random
+from statistics import median
+from time import perf_counter
+from typing import Callable, NamedTuple
+
+from benchmarks.generators import GENERATORS, write_adjacency
+from file_parcer import read_adjacency
+from matrices import np
+from my_graph import Graph
+from result_cache import shared_cache
+
+MATRIX_LIMIT = 2000
+SLOWER = 1.2
+
+
+class Case(NamedTuple):
+    setup: Callable[[Graph, str], object]
+    run: Callable[[object], object]
+    matrix: bool = False
+
+
+def fresh(graph: Graph, directory: str) -> Graph:
+    return copy.deepcopy(graph)
+
+def adjacency_rows(graph: Graph, directory: str) -> list[list[int]]:
+    names = sorted(graph.vertices(), key=int)
+    return [[int(sum(graph.edges[start][end].values())) if end in graph.edges[start] else 0
+             for end in names] for start in names]
+
+def weight_rows(graph: Graph, directory: str) -> list[list[float]]:
+    names = sorted(graph.vertices(), key=int)
+    return [[graph.min_weight(start, end) if end in graph.edges[start] else float("nan")
+             for end in names] for start in names]
+
+def adjacency_file(graph: Graph, directory: str) -> str:
+    path = os.path.join(directory, "adjacency.txt")
+    write_adjacency(graph, path)
+    return path
+
+def relabelled(graph: Graph, directory: str) -> tuple[Graph, Graph]:
+    names = list(graph.vertices())
+    shuffled = names.copy()
+    Random(0).shuffle(shuffled)
+    mapping = dict(zip(names, shuffled))
+    other = Graph()
+    for vertex in shuffled:
+        other.add_vertex(vertex)
+    for start in names:
+        for end in graph.list_adjacent(start):
+            other.set_edge(mapping[start], mapping[end], graph.edges[start][end])
+    return copy.deepcopy(graph), other
+
+
+CASES = {
+    "from_adjacency": Case(adjacency_rows, Graph.from_adjacency, matrix=True),
+    "from_weights": Case(weight_rows, Graph.from_weights, matrix=True),
+    "read_adjacency": Case(adjacency_file, read_adjacency, matrix=True),
+    "dedstar": Case(fresh, lambda graph: graph.dedstar("0")),
+    "min_spanning_tree": Case(fresh, lambda graph: graph.min_spanning_tree()),
+    "reachability": Case(fresh, lambda graph: graph.reachability()),
+    "degree": Case(fresh, lambda graph: dict(graph.degree())),
+    "__eq__": Case(relabelled, lambda pair: pair[0] == pair[1]),
+}
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def time_case(case: Case, graph: Graph, directory: str, repeat: int) -> list[float]:
+    times = list()
+    for _ in range(repeat):
+        state = case.setup(graph, directory)
+        shared_cache.clear()
+        begin = perf_counter()
+        case.run(state)
+        times.append(perf_counter() - begin)
+    return times
+
+def run(sizes: list[int], generators: list[str], cases: list[str],
+        repeat: int) -> dict:
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+        for generator in generators:
+            for n in sizes:
+                graph = GENERATORS[generator](n, 0)
+                n_edges = sum(graph.degree().values())
+                for name in cases:
+                    case = CASES[name]
+                    if case.matrix and n > MATRIX_LIMIT:
+                        continue
+                    times = time_case(case, graph, directory, repeat)
+                    results.append({"case": name, "generator": generator,
+                                    "vertices": len(graph.vertices()),
+                                    "edges": n_edges, "size": n,
+                                    "min": min(times), "median": median(times),
+                                    "times": times})
+                    print(f"{generator:>16} {n:7} {name:>18} "\
+                          +f"{min(times)*1000:10.2f} ms", flush=True)
+    return {"commit": commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__ if np is not None else None,
+            "results": results}
+
+def compare(old: dict, new: dict, threshold: float=SLOWER) -> int:
+    """Print new/old ratios of the minimal times; returns the number of
+    cases slower than `threshold`."""
+    key = lambda result: (result["case"], result["generator"], result["size"])
+    before = {key(result): result["min"] for result in old["results"]}
+    slower = 0
+    for result in new["results"]:
+        if key(result) not in before:
+            continue
+        ratio = result["min"] / max(before[key(result)], 1e-9)
+        mark = ""
+        if ratio > threshold:
+            mark = "  slower"
+            slower += 1
+        case, generator, size = key(result)
+        print(f"{generator:>16} {size:7} {case:>18} {ratio:8.2f}x{mark}")
+    return slower
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS),
+                        default=list(GENERATORS))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        old, new = (json.load(open(path)) for path in args.compare)
+        return 1 if compare(old, new) else 0
+
+    report = run(args.sizes, args.generators, args.cases, args.repeat)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=1)
+    print(f"saved to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
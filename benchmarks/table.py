@@ -0,0 +1,53 @@
+"""Opening and exporting a 5000×5000 reachability matrix.
+
+The export timings run anywhere; the time until the grid window is drawn
+and the time of one page of scrolling need a display.
+
+    python -m benchmarks.table [vertices]
+"""
+import os
+import sys
+import tempfile
+import tkinter as tk
+from time import perf_counter
+
+from benchmarks.generators import random_sparse
+from export import write_binary, write_csv
+from widgets import Matrix_window
+
+SIZE = 5000
+
+
+def main(n: int):
+    graph = random_sparse(n, degree=1)
+    begin = perf_counter()
+    names, matrix = graph.reachability_matrix()
+    print(f"reachability_matrix: {perf_counter() - begin:6.2f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for writer, args, file in ((write_csv, (names, matrix), "matrix.csv"),
+                                   (write_binary, (matrix,), "matrix.npy")):
+            path = os.path.join(directory, file)
+            begin = perf_counter()
+            writer(path, *args)
+            print(f"{writer.__name__:>19}: {perf_counter() - begin:6.2f} s, "\
+                  +f"{os.path.getsize(path) / 2**20:7.1f} MiB")
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"no display: {e}")
+        return
+    begin = perf_counter()
+    window = Matrix_window(root, names, matrix, "Матрица достижимости")
+    root.update()
+    print(f"{'open':>19}: {perf_counter() - begin:6.2f} s")
+    begin = perf_counter()
+    window.yview("scroll", 1, "pages")
+    root.update()
+    print(f"{'scroll':>19}: {perf_counter() - begin:6.3f} s")
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else SIZE)
@@ -0,0 +1,89 @@
+"""Tk event loop latency while an analysis runs in the worker pool.
+
+A 16 ms ticker records the real gap between its callbacks while the
+distance matrix of a random graph is computed, first in the background
+through the job runner and then synchronously inside a callback as the
+canvas used to do. Needs a display.
+
+    python -m benchmarks.ui_latency [vertices]
+"""
+import sys
+import tkinter as tk
+from statistics import quantiles
+from time import perf_counter
+
+from benchmarks.generators import random_sparse
+from result_cache import shared_cache
+from workers import runner
+
+FRAME = 16
+
+
+class Ticker:
+
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        self.gaps = list()
+        self.last = None
+        self.running = False
+
+    def start(self):
+        self.gaps.clear()
+        self.last = perf_counter()
+        self.running = True
+        self.root.after(FRAME, self.tick)
+
+    def tick(self):
+        now = perf_counter()
+        self.gaps.append((now - self.last) * 1000)
+        self.last = now
+        if self.running:
+            self.root.after(FRAME, self.tick)
+
+    def report(self, name: str):
+        worst = max(self.gaps)
+        p95 = quantiles(self.gaps, n=20)[-1] if len(self.gaps) > 1 else worst
+        late = worst - FRAME
+        print(f"{name:>12}: {len(self.gaps):5} frames, p95 {p95:7.1f} ms, "\
+              +f"worst {worst:8.1f} ms, worst delay {late:8.1f} ms")
+
+def main(n: int):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"no display: {e}")
+        return
+    root.withdraw()
+    graph = random_sparse(n)
+    ticker = Ticker(root)
+
+    def background():
+        ticker.start()
+        begin = perf_counter()
+        def done(result):
+            ticker.running = False
+            print(f"background job finished in {perf_counter() - begin:.2f} s")
+            ticker.report("background")
+            shared_cache.clear()
+            root.after(100, synchronous)
+        runner.analyse(root, graph, "all_distances", on_done=done)
+
+    def synchronous():
+        ticker.start()
+        def blocking():
+            graph.all_distances()
+            ticker.running = False
+            root.after(2*FRAME, finish)
+        root.after(FRAME, blocking)
+
+    def finish():
+        ticker.report("synchronous")
+        runner.shutdown()
+        root.destroy()
+
+    root.after(100, background)
+    root.mainloop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 500)
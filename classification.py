@@ -0,0 +1,79 @@
+"""Sorting many graphs into classes of isomorphic ones.
+
+Every graph first gets a digest of cheap invariants: vertex count, edge
+data, the sorted (out, in)-degree sequence and the colour histograms of
+Weisfeiler-Lehman refinement. Graphs with different digests cannot be
+isomorphic, so canonical labels are only computed for graphs that share
+a digest with another one. Both steps run in a process pool.
+"""
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from hashlib import blake2b
+from typing import Callable, Hashable, Sequence, TypeVar
+
+from instrumentation import count, timed
+from isomorphism import canonical_label, refine, structure, views
+
+Item = TypeVar("Item")
+
+CHUNK_SIZE = 64
+
+
+def invariant(graph) -> Hashable:
+    names, out, inp, labels = structure(graph)
+    degrees = sorted((len(o), len(i)) for o, i in zip(out, inp))
+    label_counts = Counter(l for adjacent in out for _, l in adjacent)
+    colours, trace = refine([0] * len(names), views(out, inp, len(labels)))
+    histogram = sorted(Counter(colours).items())
+    return (len(names), labels, sorted(label_counts.items()),
+            degrees, trace, histogram)
+
+def digest(graph) -> bytes:
+    """Short stable hash of `invariant`, the same in every process."""
+    return blake2b(repr(invariant(graph)).encode(), digest_size=16).digest()
+
+
+def _same(graph):
+    return graph
+
+def _digest(load: Callable[[Item], object], item: Item) -> bytes:
+    return digest(load(item))
+
+def _label(load: Callable[[Item], object], item: Item) -> Hashable:
+    return canonical_label(load(item))
+
+def _map(function: Callable, items: list, jobs: int | None) -> list:
+    if jobs == 1 or len(items) < 2:
+        return list(map(function, items))
+    with ProcessPoolExecutor(jobs) as pool:
+        return list(pool.map(function, items, chunksize=CHUNK_SIZE))
+
+@timed("classification.classify")
+def classify(items: Sequence[Item], load: Callable[[Item], object]=_same,
+             jobs: int=None) -> list[list[int]]:
+    """Indices of `items` grouped by isomorphism of `load(item)`.
+
+    Classes are ordered by their first index. `load` turns an item into
+    a graph inside the workers, so items can be file names instead of
+    graphs that would be pickled; it must be a module-level function.
+    """
+    digests = _map(partial(_digest, load), list(items), jobs)
+    return group(items, digests, load, jobs)
+
+def group(items: Sequence[Item], digests: Sequence[bytes],
+          load: Callable[[Item], object]=_same, jobs: int=None) -> list[list[int]]:
+    """Second step of `classify` for items whose digests are known."""
+    buckets = defaultdict(list)
+    for i, key in enumerate(digests):
+        buckets[key].append(i)
+    shared = [i for bucket in buckets.values() if len(bucket) > 1 for i in bucket]
+    count("classification.buckets", len(buckets))
+    count("classification.labels", len(shared))
+
+    labels = dict(zip(shared, _map(partial(_label, load),
+                                   [items[i] for i in shared], jobs)))
+    classes = defaultdict(list)
+    for i, key in enumerate(digests):
+        classes[key, labels.get(i)].append(i)
+    return sorted(classes.values())
@@ -0,0 +1,74 @@
+"""Strongly connected components and transitive closure of a Frozen_graph.
+
+Reachability is computed on the condensation: every component gets a
+Python int used as a bitset of the vertices it reaches, built from the
+bitsets of the components it has edges into.
+"""
+
+
+def strongly_connected_components(frozen) -> list[list[int]]:
+    """Iterative Tarjan; components come in reverse topological order."""
+    offsets, targets = frozen.offsets, frozen.targets
+    size = len(frozen)
+    index, low = [-1] * size, [0] * size
+    on_stack = bytearray(size)
+    stack, components = list(), list()
+    counter = 0
+    for root in range(size):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        path = [(root, offsets[root])]
+        while path:
+            vertex, i = path[-1]
+            if i < offsets[vertex+1]:
+                path[-1] = vertex, i + 1
+                child = targets[i]
+                if index[child] == -1:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = 1
+                    path.append((child, offsets[child]))
+                elif on_stack[child] and index[child] < low[vertex]:
+                    low[vertex] = index[child]
+                continue
+
+            path.pop()
+            if path:
+                parent = path[-1][0]
+                low[parent] = min(low[parent], low[vertex])
+            if low[vertex] == index[vertex]:
+                component = list()
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component.append(member)
+                    if member == vertex:
+                        break
+                components.append(component)
+    return components
+
+def reachability_bits(frozen) -> list[int]:
+    """Bitset of the vertices reachable from every vertex, itself included."""
+    offsets, targets = frozen.offsets, frozen.targets
+    components = strongly_connected_components(frozen)
+    component_of = [0] * len(frozen)
+    for c, members in enumerate(components):
+        for vertex in members:
+            component_of[vertex] = c
+
+    reach = [0] * len(components)
+    for c, members in enumerate(components):
+        bits = 0
+        for vertex in members:
+            bits |= 1 << vertex
+            for child in targets[offsets[vertex]:offsets[vertex+1]]:
+                other = component_of[child]
+                if other != c:
+                    bits |= reach[other]
+        reach[c] = bits
+    return [reach[c] for c in component_of]
@@ -0,0 +1,2 @@
+# the modules live at the top of the repository: pytest puts this
+# directory on sys.path for the tests in tests/
@@ -43,8 +43,10 @@ class CustomNotebook(ttk.Notebook):
         index = self.index("@%d,%d" % (event.x, event.y))
 
         if self._active == index:
+            tab = self.nametowidget(self.tabs()[index])
             self.forget(index)
             self.event_generate("<<NotebookTabClosed>>")
+            tab.destroy()
 
         self.state(["!pressed"])
         self._active = None
@@ -0,0 +1,64 @@
+"""Writing result matrices to files one row at a time.
+
+A matrix is any sequence of rows (lists, 0/1 `bytes` rows, NumPy arrays)
+in the order of `names`; nothing of the size of the whole matrix is built
+on the way. CSV files get a header of vertex names and a name column.
+The binary format is .npy (version 1.0) of little-endian float64; without
+NumPy the header is written here and the rows follow it.
+"""
+import csv
+from array import array
+import struct
+from functools import lru_cache
+from sys import byteorder
+from typing import Callable, Sequence
+
+from instrumentation import timed
+from matrices import np
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_ALIGNMENT = 64
+
+
+def number(value: float) -> str:
+    return f"{value:g}"
+
+@timed("export.write_csv")
+def write_csv(path: str, names: Sequence[str], matrix: Sequence[Sequence[float]],
+              cell: Callable[[float], str]=number):
+    # result matrices repeat few values (0/1, small distances, inf)
+    cell = lru_cache(maxsize=4096)(cell)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["", *names])
+        for name, row in zip(names, matrix):
+            writer.writerow([name, *map(cell, row)])
+
+def npy_header(size: int) -> bytes:
+    """Header of a .npy file holding a size x size float64 matrix."""
+    header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }" % (size, size)
+    # magic, header length and header end with a newline on a multiple of 64
+    padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % NPY_ALIGNMENT
+    header = (header + " "*padding + "\n").encode("latin1")
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header
+
+@timed("export.write_binary")
+def write_binary(path: str, matrix: Sequence[Sequence[float]]):
+    size = len(matrix)
+    if np is not None:
+        out = np.lib.format.open_memmap(path, mode="w+", dtype="<f8",
+                                        shape=(size, size))
+        for i, row in enumerate(matrix):
+            if isinstance(row, (bytes, bytearray)):
+                row = np.frombuffer(row, dtype=np.uint8)
+            out[i] = row
+        out.flush()
+        del out
+        return
+    with open(path, "wb") as file:
+        file.write(npy_header(size))
+        for row in matrix:
+            values = array("d", iter(row))  # bytes rows are values, not raw data
+            if byteorder == "big":
+                values.byteswap()
+            values.tofile(file)
@@ -1,10 +1,20 @@
+"""Reading matrix files: the size on the first line, then one row per line.
+
+Lines are read in large chunks. With NumPy installed the rows are
+converted a chunk at a time by `np.loadtxt`; a chunk NumPy rejects is
+parsed again line by line, which gives the same row and column errors.
+"""
 from io import TextIOWrapper
+from typing import Iterator
 
 from exceptions import BadFile
+from instrumentation import count, span
+from matrices import np
 
+CHUNK_SIZE = 1 << 20
 
-def read_size(file: TextIOWrapper) -> int:
-    line = file.readline()
+
+def parse_size(line: str) -> int:
     try:
         size = int(line)
     except ValueError:
@@ -12,30 +22,85 @@ def read_size(file: TextIOWrapper) -> int:
     else:
         return size
 
-def read_row(file: TextIOWrapper, n: int, n_parts: int) -> list[int]:
-    line = file.readline()
+def parse_row(line: str, n: int, n_parts: int) -> list[float]:
     parts = line.split()
     if len(parts) != n_parts:
         raise BadFile(f"Некорректная длинна строки {n}: "\
                       +f"Ожидалось {n_parts}, получено {len(parts)}")
-    result = list()
+    try:
+        return list(map(float, parts))
+    except ValueError:
+        pass
     for i, raw in enumerate(parts):
         try:
-            parsed = float(raw)
+            float(raw)
         except ValueError:
             raise BadFile(f"Некорректный символ {i} строки {n}: {raw}")
-        else:
-            result.append(parsed)
-    return result
 
-def read_adjacency(path: str) -> list[list[int]]:
-    with open(path) as file:
-        size = read_size(file)
-        matrix = [read_row(file, i, size) for i in range(size)]
-    return matrix
+def read_lines(file: TextIOWrapper, chunk_size: int=CHUNK_SIZE) -> Iterator[str]:
+    # only '\n' ends a line: str.splitlines also splits on form feeds,
+    # \x1c-\x1e, \x85 and \u2028, which must stay inside a row
+    tail = ''
+    while chunk := file.read(chunk_size):
+        lines = (tail + chunk).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if tail:
+        yield tail
+
+def parse_block(lines: list[str], first: int, n_parts: int) -> 'np.ndarray':
+    """Rows `first`, `first+1`... of the matrix as one 2-D array."""
+    try:
+        block = np.loadtxt(lines, ndmin=2, comments=None)
+    except ValueError:
+        block = None
+    # loadtxt also skips blank lines, which must fail as short rows
+    if block is None or block.shape != (len(lines), n_parts):
+        rows = [parse_row(line, first+i, n_parts) for i, line in enumerate(lines)]
+        block = np.array(rows, dtype=float).reshape(len(lines), n_parts)
+    return block
+
+def read_size(file: TextIOWrapper) -> int:
+    return parse_size(file.readline())
+
+def read_row(file: TextIOWrapper, n: int, n_parts: int) -> list[float]:
+    return parse_row(file.readline(), n, n_parts)
+
+def iter_blocks(path: str) -> Iterator['np.ndarray']:
+    """Rows of the matrix in 2-D arrays of about CHUNK_SIZE characters
+    of text each; needs NumPy."""
+    with span("file_parcer.iter_blocks"), open(path, buffering=CHUNK_SIZE) as file:
+        lines = read_lines(file)
+        size = parse_size(next(lines, ''))
+        first = 0
+        while first < size:
+            batch, length = list(), 0
+            while first + len(batch) < size and length < CHUNK_SIZE:
+                line = next(lines, '')
+                batch.append(line)
+                length += len(line) + 1
+            count("file_parcer.rows", len(batch))
+            yield parse_block(batch, first, size)
+            first += len(batch)
+
+def iter_rows(path: str) -> Iterator[list[float]]:
+    if np is not None:
+        for block in iter_blocks(path):
+            yield from block.tolist()
+        return
+    with span("file_parcer.iter_rows"), open(path, buffering=CHUNK_SIZE) as file:
+        lines = read_lines(file)
+        size = parse_size(next(lines, ''))
+        for i in range(size):
+            count("file_parcer.rows")
+            yield parse_row(next(lines, ''), i, size)
+
+def read_adjacency(path: str) -> list[list[float]]:
+    return list(iter_rows(path))
 
-def read_weighted(path: str) -> list[list[int]]:
+def read_weighted(path: str) -> list[list[float]]:
     return read_adjacency(path)
 
 if __name__ == '__main__':
-    print(read_adjacency("examples/test1_A.txt"))
\ No newline at end of file
+    print(read_adjacency("examples/test1_A.txt"))
@@ -0,0 +1,292 @@
+"""Immutable array-backed graph storage.
+
+Vertices are numbered by their position in `names`; the edges leaving
+vertex `i` occupy the slice `offsets[i]:offsets[i+1]` of the parallel
+`targets`, `weights` and `counts` arrays (compressed sparse rows). A pair
+of vertices joined by edges of several weights has one entry per weight,
+which keeps the multi-edge semantics of the dict-based `Graph`.
+
+`save` writes the same arrays into a binary container: a header, the
+NUL-separated vertex names and the four arrays, each aligned to 8 bytes.
+Everything is little-endian, whatever the machine that wrote the file.
+`load` maps the file into memory and reads the arrays in place, so pages
+are only read from disk when an algorithm touches them. Graphs built from
+NumPy matrices keep the NumPy arrays the same way, behind memoryviews;
+both are turned into bytes when the graph is pickled.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from collections import defaultdict
+from hashlib import blake2b
+from itertools import compress
+from sys import intern
+from typing import Iterable
+
+from all_pairs import Strategy, all_pairs, shortest_distances
+from components import reachability_bits, strongly_connected_components
+from exceptions import BadFile
+
+from matrices import (StoredData, array_mask, check_stored_data, 
+                      incidence_edges, is_array, matrix_rows, np)
+from spanning_tree import Algorithm, spanning_tree
+
+MAGIC = b"GPG1"
+HEADER = struct.Struct("<4sqqq")
+ARRAYS = ("offsets", "targets", "weights", "counts")
+
+
+def _padding(size: int) -> bytes:
+    return bytes(-size % 8)
+
+def is_binary(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+def _byte_order(data: array | memoryview) -> array | memoryview:
+    """Swaps `data` between the native and the little-endian byte order
+    of the file format; a no-op on little-endian machines."""
+    if sys.byteorder == "little":
+        return data
+    data = array(getattr(data, "typecode", None) or data.format, data)
+    data.byteswap()
+    return data
+
+def _valid_rows(offsets, targets, n_vertices: int) -> bool:
+    """Whether `offsets` and `targets` describe rows of the vertices."""
+    if offsets[0] != 0 or offsets[-1] != len(targets):
+        return False
+    if np is not None:
+        offsets = np.frombuffer(offsets, dtype=np.int64)
+        targets = np.frombuffer(targets, dtype=np.int64)
+        return (bool(np.all(offsets[:-1] <= offsets[1:])) 
+                and (not len(targets) 
+                     or 0 <= targets.min() and targets.max() < n_vertices))
+    return (all(a <= b for a, b in zip(offsets, offsets[1:]))
+            and all(0 <= target < n_vertices for target in targets))
+
+def _from_numpy(typecode: str, values: 'np.ndarray') -> memoryview:
+    """A view of the array with the item format of `array(typecode)`,
+    which keeps the array alive instead of copying it."""
+    dtype = {'q': np.int64, 'd': np.float64}[typecode]
+    return memoryview(np.ascontiguousarray(values, dtype=dtype)).cast('B').cast(typecode)
+
+
+class Frozen_graph:
+
+    def __init__(self, names: list[str], offsets: array, targets: array,
+                 weights: array, counts: array):
+        self.names = [intern(name) for name in names]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.counts = counts
+
+    def __getstate__(self) -> dict:
+        state = vars(self).copy()
+        for name in ARRAYS:
+            data = state[name]
+            if isinstance(data, memoryview):
+                state[name] = data.format, data.tobytes()
+        return state
+
+    def __setstate__(self, state: dict):
+        for name in ARRAYS:
+            if isinstance(state[name], tuple):
+                typecode, data = state[name]
+                state[name] = memoryview(data).cast(typecode)
+        vars(self).update(state)
+
+    @classmethod
+    def from_edges(cls, edges: dict[str, dict[str, dict[int|float, float]]]) -> 'Frozen_graph':
+        names = list(edges)
+        index = {name: i for i, name in enumerate(names)}
+        for adjacent in edges.values():
+            for end in adjacent:
+                if end not in index:
+                    index[end] = len(names)
+                    names.append(end)
+
+        offsets, targets = array('q', [0]), array('q')
+        weights, counts = array('d'), array('d')
+        for start in names:
+            for end, edge in edges.get(start, {}).items():
+                for weight, count in edge.items():
+                    targets.append(index[end])
+                    weights.append(weight)
+                    counts.append(count)
+            offsets.append(len(targets))
+        return cls(names, offsets, targets, weights, counts)
+
+    @classmethod
+    def _from_values(cls, size: int, offsets: array, targets: array, 
+                     values: array, stored_data: StoredData) -> 'Frozen_graph':
+        if is_array(values):
+            ones = _from_numpy('d', np.ones(len(values)))
+            zeros = _from_numpy('d', np.zeros(len(values)))
+            offsets, targets, values = (_from_numpy('q', offsets), 
+                                        _from_numpy('q', targets),
+                                        _from_numpy('d', values))
+        else:
+            ones = array('d', [1]) * len(targets)
+            zeros = array('d', [0]) * len(targets)
+        if stored_data == "weight":
+            weights, counts = values, ones
+        else:
+            weights, counts = zeros, values
+        return cls([str(i) for i in range(size)], offsets, targets, weights, counts)
+
+    @classmethod
+    def from_matrix(cls, matrix, 
+                    stored_data: StoredData="weight") -> 'Frozen_graph':
+        check_stored_data(stored_data)
+        if is_array(matrix):
+            return cls.from_blocks((matrix,), stored_data)
+
+        size = 0
+        offsets, targets, values = array('q', [0]), array('q'), array('d')
+        for start, row_ends, row_values in matrix_rows(matrix, stored_data):
+            targets.extend(row_ends)
+            values.extend(row_values)
+            offsets.append(len(targets))
+            size = start + 1
+        return cls._from_values(size, offsets, targets, values, stored_data)
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable['np.ndarray'], 
+                    stored_data: StoredData="weight") -> 'Frozen_graph':
+        """Graph of a matrix given as NumPy arrays of consecutive rows."""
+        check_stored_data(stored_data)
+        counts = [np.zeros(1, dtype=np.int64)]
+        ends, values = [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+        for block in blocks:
+            block = np.asarray(block, dtype=float)
+            mask = array_mask(block, stored_data)
+            counts.append(np.count_nonzero(mask, axis=1))
+            # the flat positions of a row-major mask, less the rows
+            ends.append(np.flatnonzero(mask) % max(block.shape[1], 1))
+            values.append(block[mask])
+        offsets = np.cumsum(np.concatenate(counts))
+        return cls._from_values(len(offsets) - 1, offsets, np.concatenate(ends), 
+                                np.concatenate(values), stored_data)
+
+    @classmethod
+    def from_incidence(cls, matrix, 
+                       stored_data: StoredData="count") -> 'Frozen_graph':
+        check_stored_data(stored_data)
+        size, starts, ends, values = incidence_edges(matrix)
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        offsets = array('q', [0]) * (size+1)
+        for start in starts:
+            offsets[start+1] += 1
+        for i in range(size):
+            offsets[i+1] += offsets[i]
+        targets = array('q', (ends[i] for i in order))
+        values = array('d', (values[i] for i in order))
+        return cls._from_values(size, offsets, targets, values, stored_data)
+
+    @classmethod
+    def load(cls, path: str) -> 'Frozen_graph':
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+                raise BadFile(f"Файл {path} не является бинарным графом")
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        _, n_vertices, n_entries, names_size = HEADER.unpack(header)
+        if min(n_vertices, n_entries, names_size) < 0:
+            raise BadFile(f"Файл {path} повреждён")
+        position = HEADER.size
+        try:
+            names = buffer[position:position+names_size].decode()
+        except UnicodeDecodeError as e:
+            raise BadFile(f"Файл {path} содержит некорректные имена вершин: {e.reason}") from e
+        names = names.split("\0") if n_vertices else []
+        if len(names) != n_vertices:
+            raise BadFile(f"Файл {path} обрезан")
+        position += names_size + len(_padding(names_size))
+
+        view = memoryview(buffer)
+        arrays = list()
+        for typecode, length in ('q', n_vertices+1), ('q', n_entries), \
+                                ('d', n_entries), ('d', n_entries):
+            end = position + 8*length
+            if end > len(view):
+                raise BadFile(f"Файл {path} обрезан")
+            arrays.append(_byte_order(view[position:end].cast(typecode)))
+            position = end
+        if not _valid_rows(*arrays[:2], n_vertices):
+            raise BadFile(f"Файл {path} повреждён")
+        return cls(names, *arrays)
+
+    def save(self, path: str):
+        names = "\0".join(self.names).encode()
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(self.names), 
+                                   len(self.targets), len(names)))
+            file.write(names + _padding(len(names)))
+            for data in self.offsets, self.targets, self.weights, self.counts:
+                file.write(_byte_order(data))
+
+    def fingerprint(self) -> bytes:
+        digest = blake2b(digest_size=16)
+        digest.update("\0".join(self.names).encode())
+        for data in self.offsets, self.targets, self.weights, self.counts:
+            digest.update(data)
+        return digest.digest()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def edges(self) -> dict[str, dict[str, dict[int|float, float]]]:
+        result = dict()
+        for start, name in enumerate(self.names):
+            adjacent = result[name] = dict()
+            for i in range(self.offsets[start], self.offsets[start+1]):
+                edge = adjacent.setdefault(self.names[self.targets[i]], dict())
+                weight = self.weights[i]
+                edge[weight] = edge.get(weight, 0) + self.counts[i]
+        return result
+
+    def degree(self) -> dict[str, int]:
+        counts, offsets = self.counts, self.offsets
+        return {name: int(sum(counts[offsets[i]:offsets[i+1]]))
+                for i, name in enumerate(self.names)}
+
+    def distances(self, source: int) -> list[float]:
+        return shortest_distances(self.offsets, self.targets, self.weights, source)
+
+    def all_distances(self, jobs: int=None, 
+                      strategy: Strategy="auto") -> list[list[float]]:
+        return all_pairs(self, jobs, strategy)
+
+    def dedstar(self, start: str=None) -> dict[str, float]:
+        if not self.names:
+            return {}
+        source = 0 if start is None else self.index[start]
+        return dict(zip(self.names, self.distances(source)))
+
+    def strongly_connected_components(self) -> list[list[str]]:
+        return [[self.names[v] for v in component]
+                for component in strongly_connected_components(self)]
+
+    def reachability_bits(self) -> list[int]:
+        return reachability_bits(self)
+
+    def reachability(self) -> dict[str, set[str]]:
+        names = self.names
+        return {name: set(compress(names, map(int, bin(bits)[:1:-1])))
+                for name, bits in zip(names, reachability_bits(self))}
+
+    def min_spanning_tree(self, start: str=None, 
+                          algorithm: Algorithm="prim") -> 'Frozen_graph':
+        names = self.names
+        source = None if start is None else self.index[start]
+        edges = defaultdict(dict)
+        for name in names if source is None else (start,):
+            edges[name] = dict()
+        for begin, end, weight in spanning_tree(self, source, algorithm):
+            edges[names[begin]][names[end]] = {weight: 1}
+            edges[names[end]][names[begin]] = {weight: 1}
+        return Frozen_graph.from_edges(edges)
@@ -1,41 +1,88 @@
-from statistics import mean
 import tkinter as tk
 from cmath import rect
 from functools import partial
-from math import atan2, cos, dist, pi, sin
+from math import atan2, cos, inf, pi, sin
+from typing import Callable, NamedTuple
 
+from instrumentation import count, span, timed
+from layout import LAYOUTS, Layout_thread, Name, Point
+from matrices import np
 from my_graph import Graph
-from widgets import show_table
+from raster import photo_data
+from spatial_index import Box_index, Grid_index, crosses
+from spanning_tree import Algorithm
+from widgets import show_matrix, show_progress
+from workers import Job, runner
 
 figID = int
 
+BATCH = 64
+DETAIL_ZOOM = 0.5
+MAX_EDGE_ITEMS = 2000
+MAX_VERTEX_ITEMS = 2000
+ZOOM_STEP = 1.2
+FRAME = 16
+LAYOUT_SECONDS = 10
+
+
+class View(NamedTuple):
+    """What a canvas needs to be rebuilt as the user left it."""
+    positions: dict[str, Point]
+    scale: float
+    origin: Point
+
 class Vertex:
-    def __init__(self, canvas: tk.Canvas, name: str):
+    r = 20
+
+    def __init__(self, canvas: 'Graph_canvas', name: str):
         self.canvas = canvas
-        self.r = 20
-        self.oval = canvas.create_oval(-self.r, -self.r, self.r, self.r, 
-                                        fill="red", tags="movable")
-        self.text = canvas.create_text(0, 0, text=name,
-                                       width=self.r*2,
-                                       font=('Helvetica', '20'))
-        
-        x1, y1, x2, y2 = self.canvas.bbox(self.text)
-        self.text_offset = (x2-x1)/2, (y2-y1)/2
+        self.name = name
+        self.x, self.y = 0, 0
+        self.oval = self.text = None
         self.edges = set()
+        canvas.index.move(self, self.x, self.y)
     
     def add_edge(self, edge: 'Edge'):
         self.edges.add(edge)
 
     @property
     def center(self) -> tuple[float, float]:
-        x0, y0, x1, y1 = self.canvas.coords(self.oval)
-        return (x0+x1)/2, (y0+y1)/2
+        return self.x, self.y
+
+    def show(self, detailed: bool):
+        if self.oval is None:
+            self.oval = self.canvas.create_oval(0, 0, 0, 0,
+                                                fill="red", tags="movable")
+            count("canvas.items_created")
+        if detailed and self.text is None:
+            self.text = self.canvas.create_text(0, 0, text=self.name,
+                                                width=self.r*2,
+                                                font=('Helvetica', '20'))
+            count("canvas.items_created")
+        elif not detailed and self.text is not None:
+            self.canvas.delete(self.text)
+            self.text = None
+        self.place()
+
+    def hide(self):
+        self.canvas.delete(*(item for item in (self.oval, self.text)
+                             if item is not None))
+        self.oval = self.text = None
+
+    def place(self):
+        x, y = self.canvas.to_screen(self.x, self.y)
+        r = self.r * self.canvas.scale
+        self.canvas.coords(self.oval, x-r, y-r, x+r, y+r)
+        if self.text is not None:
+            self.canvas.coords(self.text, x, y)
     
-    def moveto(self, x: int, y: int):
-        self.canvas.moveto(self.oval, x-self.r, y-self.r)
-        self.canvas.moveto(self.text, x-self.text_offset[0], y-self.text_offset[1])
-        for edge in self.edges:
-            edge.update()
+    def moveto(self, x: float, y: float):
+        self.x, self.y = x, y
+        self.canvas.index.move(self, x, y)
+        if self.oval is not None:
+            self.place()
+        self.canvas.dirty.update(self.edges)
+        self.canvas.stale.update(self.edges)
 
 class Edge:
     def __init__(self, canvas: tk.Canvas, 
@@ -43,37 +90,82 @@ class Edge:
                  label: str=None) -> None:
         self.canvas = canvas
         self.start, self.end = start, end
-        self.line = self.canvas.create_line(0, 0, 0, 0,
-                                            arrow=tk.LAST,
-                                            arrowshape=(16,20,6))
-        self.label = None
-        if label is not None:
-            self.label = self.canvas.create_text(0, 0, text=label)
+        self.text = label
+        self.line = self.label = None
+        self.detailed = False
+
+    def show(self, detailed: bool):
+        if self.line is None:
+            self.line = self.canvas.create_line(0, 0, 0, 0,
+                                                arrow=tk.LAST if detailed else tk.NONE,
+                                                arrowshape=(16,20,6))
+            self.detailed = detailed
+            count("canvas.items_created")
+        elif detailed != self.detailed:
+            self.canvas.itemconfigure(self.line,
+                                      arrow=tk.LAST if detailed else tk.NONE)
+            self.detailed = detailed
+        if detailed and self.text is not None and self.label is None:
+            self.label = self.canvas.create_text(0, 0, text=self.text)
+            count("canvas.items_created")
+        elif not detailed and self.label is not None:
+            self.canvas.delete(self.label)
+            self.label = None
+
+    def hide(self):
+        self.canvas.delete(*(item for item in (self.line, self.label)
+                             if item is not None))
+        self.line = self.label = None
     
-    def offset(self, start: Vertex, end: Vertex) -> tuple[float, float, float, float]:
-        (x1, y1), (x2, y2) = start.center, end.center
+    @property
+    def segment(self) -> tuple[float, float, float, float]:
+        return self.start.x, self.start.y, self.end.x, self.end.y
+
+def edge_geometry(segments: list[tuple[float, float, float, float]],
+                  r: float) -> list[tuple[float, float, float, float]]:
+    """Lines between circles of radius `r` centred at the segment ends."""
+    if np is not None and len(segments) >= BATCH:
+        x1, y1, x2, y2 = np.array(segments, dtype=float).T
+        angle = np.arctan2(y2-y1, x2-x1)
+        c, s = np.cos(angle)*r, np.sin(angle)*r
+        return np.stack((x1+c, y1+s, x2-c, y2-s), axis=1).tolist()
+    lines = list()
+    for x1, y1, x2, y2 in segments:
         angle = atan2((y2-y1), (x2-x1))
-        r1, r2 = start.r, end.r
-        c, s = cos(angle), sin(angle)
-        return (x1+c*r1, y1+s*r1,
-                x2-c*r2, y2-s*r2)
-    
-    def update(self):
-        self.canvas.coords(self.line, *self.offset(self.start, self.end))
-        if self.label is not None:
-            (x1, y1), (x2, y2) = self.start.center, self.end.center
-            x, y = mean((x1, x2)), mean((y1, y2))
-            self.canvas.moveto(self.label, x, y)
+        c, s = cos(angle)*r, sin(angle)*r
+        lines.append((x1+c, y1+s, x2-c, y2-s))
+    return lines
 
 class Graph_canvas(tk.Canvas):
-    def __init__(self, master, graph: Graph) -> None:
+    def __init__(self, master, graph: Graph, view: View=None) -> None:
         self.height, self.width = 400, 400
         super().__init__(master, bg="white", height=self.height, width=self.width)
         self.graph = graph
+        self.index = Grid_index(cell_size=40)
+        self.edge_index = Box_index()
+        self.dirty = set()
+        self.stale = set()
+        self.pending = None
+        self.scale = 1.0
+        self.origin = 0.0, 0.0
+        self.shown_vertices, self.shown_edges = set(), set()
+        self.raster = self.raster_item = None
+        self.render_pending = False
+        self.animation = None
+        self.jobs = set()
+        self.analyses = set()
         
         self.bind("<Button-1>", self.choose)
         self.bind("<ButtonRelease-1>", self.unchoose)
-        self.draw_graph(graph)
+        self.bind("<ButtonPress-2>", self.start_pan)
+        self.bind("<ButtonRelease-2>", lambda event: self.unbind("<B2-Motion>"))
+        self.bind("<MouseWheel>",
+                  lambda event: self.zoom(event, ZOOM_STEP if event.delta > 0 
+                                                 else 1/ZOOM_STEP))
+        self.bind("<Button-4>", lambda event: self.zoom(event, ZOOM_STEP))
+        self.bind("<Button-5>", lambda event: self.zoom(event, 1/ZOOM_STEP))
+        self.bind("<Configure>", lambda event: self.schedule_render())
+        self.draw_graph(graph, view)
         self.create_menu()
     
     def create_menu(self):
@@ -81,9 +173,18 @@ class Graph_canvas(tk.Canvas):
         menu.add_command(label="Матрица достижимости", 
                               command=self.show_reachability)
         menu.add_command(label="Оставное дерево Прима", 
-                              command=self.spanning_tree)
+                              command=partial(self.spanning_tree, "prim"))
+        menu.add_command(label="Оставное дерево Краскала", 
+                              command=partial(self.spanning_tree, "kruskal"))
         menu.add_command(label="Матрица расстояний", 
                               command=self.show_distance)
+        menu.add_separator()
+        menu.add_command(label="Расположить по кругу", 
+                              command=partial(self.relayout, "circle"))
+        menu.add_command(label="Раскладка Фрюхтермана-Рейнгольда", 
+                              command=partial(self.relayout, "fruchterman_reingold"))
+        menu.add_command(label="Раскладка ForceAtlas", 
+                              command=partial(self.relayout, "force_atlas"))
         
         def do_popup(event):
             try:
@@ -93,82 +194,280 @@ class Graph_canvas(tk.Canvas):
         
         self.bind("<Button-3>", do_popup)
     
-    def spanning_tree(self):
-        tree = self.graph.min_spanning_tree()
-        self.master.add_tab(tree, "Spanning tree")
+    def analyse(self, title: str, method: str, *args,
+                on_done: Callable[[object], None]):
+        """Run a Graph method in the background behind a progress window;
+        the whole wait, result display included, is recorded as a span."""
+        timer = span(f"Graph_canvas.{method}", nested=False).start()
+        def done(result: object):
+            on_done(result)
+            timer.stop()
+        job = runner.analyse(self, self.graph, method, *args, on_done=done,
+                             kind="isolated")
+        if job is not None:
+            self.analyses.add(job)
+            job.listeners.append(self.analysis_finished)
+        show_progress(self, job, title)
+
+    def analysis_finished(self, job: Job):
+        self.analyses.discard(job)
+        if self.winfo_exists():
+            # queued, so that it comes after the result is shown
+            self.event_generate("<<AnalysisFinished>>", when="tail")
+
+    def spanning_tree(self, algorithm: Algorithm):
+        self.analyse("Оставное дерево", "min_spanning_tree", None, algorithm,
+                     on_done=partial(self.master.add_tab, name="Spanning tree",
+                                     select=False))
 
     def show_reachability(self):
-        reachability = self.graph.reachability()
-        
-        table = list()
-        table.append(['',] + sorted(self.graph.vertices()))
-        for start in table[0][1:]:
-            table.append([start])
-            for end in table[0][1:]:
-                table[-1].append(int(end in reachability[start]))
-        
-        show_table(table, "Матрица достижимости")
+        self.analyse("Матрица достижимости", "reachability_matrix",
+                     on_done=self.reachability_ready)
+
+    def reachability_ready(self, result: tuple[list[str], list[bytes]]):
+        names, matrix = result
+        show_matrix(self, names, matrix, "Матрица достижимости")
         
     def show_distance(self):
-        
-        table = list()
-        table.append(['',] + sorted(self.graph.vertices()))
-        for start in table[0][1:]:
-            distance = self.graph.dedstar(start)
-            table.append([start])
-            for end in table[0][1:]:
-                table[-1].append(int(distance[end]))
-        
-        show_table(table, "Матрица расстояний")
+        self.analyse("Матрица расстояний", "all_distances",
+                     on_done=self.distance_ready)
+
+    def distance_ready(self, result: tuple[list[str], list[list[float]]]):
+        names, matrix = result
+        show_matrix(self, names, matrix, "Матрица расстояний",
+                    cell=lambda d: int(d) if d < inf else '∞')
     
     def reset_positions(self):
-        n_vertices = len(self.vertices_by_figID.keys())
-        for i, vertex in enumerate(self.vertices_by_figID.values()):
-            xy = rect(self.height//3, i*pi*2/n_vertices-pi/2)
+        n_vertices = len(self.vertices)
+        radius = max(self.height//3, 3*Vertex.r*n_vertices/(2*pi))
+        for i, vertex in enumerate(self.vertices.values()):
+            xy = rect(radius, i*pi*2/n_vertices-pi/2)
             x, y = xy.real+self.width//2, xy.imag+self.height//2
             vertex.moveto(x, y)
+        self.dirty.clear()
+        self.fit(self.width//2 - radius - Vertex.r, self.height//2 - radius - Vertex.r,
+                 self.width//2 + radius + Vertex.r, self.height//2 + radius + Vertex.r)
     
-    def draw_graph(self, graph: Graph):
-        vertices = {}
+    @timed()
+    def draw_graph(self, graph: Graph, view: View=None):
+        self.vertices = {}
         for vertex in sorted(graph.vertices()):
-            vertices[vertex] = Vertex(self, vertex)
-        self.vertices_by_figID = {v.oval: v for v in vertices.values()}
+            self.vertices[vertex] = Vertex(self, vertex)
 
-        for k_start in vertices.keys():
+        for k_start in self.vertices.keys():
             for k_end in graph.list_adjacent(k_start):
-                start, end = vertices[k_start], vertices[k_end]
-                value = min(graph.weights(k_start, k_end))
+                start, end = self.vertices[k_start], self.vertices[k_end]
+                value = graph.min_weight(k_start, k_end)
                 edge = Edge(self, start, end, value or None)
                 start.add_edge(edge)
                 end.add_edge(edge)
-        self.reset_positions()
-    
-    def dist(self, point: tuple[int, int], figure: figID) -> float:
-        x1, y1, x2, y2 = self.bbox(figure)
-        center = (x1+x2)/2, (y1+y2)/2
-        return dist(center, point)
+                self.stale.add(edge)
+        if view is None:
+            self.reset_positions()
+        else:
+            self.restore(view)
+        self.render()
+
+    def view(self) -> View:
+        return View({name: vertex.center for name, vertex in self.vertices.items()},
+                    self.scale, self.origin)
+
+    def restore(self, view: View):
+        for name, (x, y) in view.positions.items():
+            self.vertices[name].moveto(x, y)
+        self.dirty.clear()
+        self.scale, self.origin = view.scale, view.origin
+
+    def schedule(self, delay: int | None, callback: Callable, *args):
+        """`after` (or `after_idle` without a delay) that is cancelled
+        when the canvas is destroyed."""
+        def run():
+            self.jobs.discard(job)
+            callback(*args)
+        job = self.after_idle(run) if delay is None else self.after(delay, run)
+        self.jobs.add(job)
+
+    def destroy(self):
+        if self.animation is not None:
+            self.animation.stop()
+            self.animation = None
+        for job in self.jobs:
+            self.after_cancel(job)
+        self.jobs.clear()
+        super().destroy()
+
+    def relayout(self, name: Name):
+        """Run a layout in a background thread; the canvas shows its
+        frames as they come."""
+        frozen = self.graph.freeze()
+        positions = [self.vertices[vertex].center for vertex in frozen.names]
+        size = 4*Vertex.r*max(len(frozen), 1)**0.5
+        layout = LAYOUTS[name](frozen, positions, size=size)
+        if self.animation is not None:
+            self.animation.stop()
+        self.animation = Layout_thread(layout, seconds=LAYOUT_SECONDS)
+        self.animation.start()
+        self.animate(frozen.names, self.animation)
+
+    def animate(self, names: list[str], thread: Layout_thread):
+        """Show the latest frame of a running layout unless another one
+        has replaced it."""
+        if thread is not self.animation:
+            return
+        finished = not thread.is_alive()
+        positions = thread.take()
+        if positions is not None:
+            self.show_frame(names, positions)
+        if finished:
+            self.animation = None
+            return
+        self.schedule(FRAME, self.animate, names, thread)
+
+    def show_frame(self, names: list[str], positions: list[Point]):
+        for name, (x, y) in zip(names, positions):
+            self.vertices[name].moveto(x, y)
+        self.dirty.clear()
+        xs, ys = [x for x, _ in positions], [y for _, y in positions]
+        self.fit(min(xs) - Vertex.r, min(ys) - Vertex.r,
+                 max(xs) + Vertex.r, max(ys) + Vertex.r)
+        self.render()
+
+    def to_screen(self, x: float, y: float) -> tuple[float, float]:
+        return (x-self.origin[0])*self.scale, (y-self.origin[1])*self.scale
+
+    def to_world(self, x: float, y: float) -> tuple[float, float]:
+        return x/self.scale+self.origin[0], y/self.scale+self.origin[1]
+
+    def view_size(self) -> tuple[int, int]:
+        if self.winfo_ismapped():
+            return self.winfo_width(), self.winfo_height()
+        return self.width, self.height
+
+    def fit(self, x0: float, y0: float, x1: float, y1: float):
+        """Zoom out (never in) until the rectangle fits and centre it."""
+        width, height = self.view_size()
+        self.scale = min(1.0, width/(x1-x0), height/(y1-y0))
+        self.origin = ((x0+x1)/2 - width/2/self.scale,
+                       (y0+y1)/2 - height/2/self.scale)
+
+    def start_pan(self, event):
+        origin, x, y = self.origin, event.x, event.y
+        def pan(event):
+            self.origin = (origin[0] - (event.x-x)/self.scale,
+                           origin[1] - (event.y-y)/self.scale)
+            self.schedule_render()
+        self.bind("<B2-Motion>", pan)
+
+    def zoom(self, event, factor: float):
+        x, y = self.to_world(event.x, event.y)
+        self.scale *= factor
+        self.origin = x - event.x/self.scale, y - event.y/self.scale
+        self.schedule_render()
+
+    def schedule_render(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.schedule(None, self.render)
+
+    @timed()
+    def render(self):
+        """Materialise the items inside the view and drop the rest.
+
+        Zoomed out below DETAIL_ZOOM, names, weights and arrowheads are
+        left out; when more edges (or vertices) are visible than can be
+        kept as canvas items they are drawn into a single image instead.
+        Edges are found by their bounding boxes, so those crossing the
+        view between two vertices outside it are drawn too.
+        """
+        self.render_pending = False
+        for edge in self.stale:
+            self.edge_index.move(edge, *edge.segment)
+        self.stale.clear()
+        width, height = self.view_size()
+        (x0, y0), (x1, y1) = self.to_world(0, 0), self.to_world(width, height)
+        area = x0-Vertex.r, y0-Vertex.r, x1+Vertex.r, y1+Vertex.r
+        vertices = set(self.index.items_in(*area))
+        edges = {edge for edge in self.edge_index.items_in(*area)
+                 if crosses(edge.segment, *area)}
+        detailed = self.scale >= DETAIL_ZOOM
+
+        raster_edges = len(edges) > MAX_EDGE_ITEMS
+        raster_vertices = len(vertices) > MAX_VERTEX_ITEMS
+        vertex_items = set() if raster_vertices else vertices
+        edge_items = set() if raster_edges else edges
+
+        for vertex in self.shown_vertices - vertex_items:
+            vertex.hide()
+        for edge in self.shown_edges - edge_items:
+            edge.hide()
+        for edge in edge_items:
+            edge.show(detailed)
+        for vertex in vertex_items:
+            vertex.show(detailed)
+        self.shown_vertices, self.shown_edges = vertex_items, edge_items
+        self.dirty = set(edge_items)
+        self.redraw_edges()
+
+        if raster_edges or raster_vertices:
+            self.draw_raster(edges if raster_edges else (),
+                             vertices if raster_vertices else ())
+        elif self.raster_item is not None:
+            self.delete(self.raster_item)
+            self.raster = self.raster_item = None
+
+    def draw_raster(self, edges: set[Edge], vertices: set[Vertex]):
+        width, height = self.view_size()
+        segments = [self.to_screen(x1, y1) + self.to_screen(x2, y2)
+                    for x1, y1, x2, y2 in (edge.segment for edge in edges)]
+        points = [self.to_screen(v.x, v.y) for v in vertices]
+        if self.raster is None or (self.raster.width(), self.raster.height()) != (width, height):
+            self.delete(*([self.raster_item] if self.raster_item is not None else []))
+            self.raster = tk.PhotoImage(width=width, height=height)
+            self.raster_item = self.create_image(0, 0, anchor=tk.NW, image=self.raster)
+            self.tag_lower(self.raster_item)
+        self.raster.put(photo_data(segments, points, width, height), to=(0, 0))
     
-    def find_target(self, x: float, y: float) -> figID:
+    def find_target(self, x: float, y: float) -> Vertex | None:
         halo = 5
-        finded = self.find_overlapping(x-halo, y-halo,
-                                       x+halo, y+halo)
-        movable = set(finded) & set(self.find_withtag("movable"))
-        if not movable:
-            return None
-        nearest = min(movable, key=partial(self.dist, (x, y)))
-        return nearest
+        return self.index.nearest(*self.to_world(x, y), Vertex.r + halo/self.scale)
     
+    def redraw_edges(self):
+        edges = [edge for edge in self.dirty if edge.line is not None]
+        if len(edges) < len(self.dirty) and self.raster_item is not None:
+            self.schedule_render()
+        self.dirty.clear()
+        segments = [self.to_screen(x1, y1) + self.to_screen(x2, y2)
+                    for x1, y1, x2, y2 in (edge.segment for edge in edges)]
+        lines = edge_geometry(segments, Vertex.r*self.scale)
+        for edge, line, (x1, y1, x2, y2) in zip(edges, lines, segments):
+            self.coords(edge.line, *line)
+            if edge.label is not None:
+                self.moveto(edge.label, (x1+x2)/2, (y1+y2)/2)
+
     def update(self, vertex: Vertex, event):
-        vertex.moveto(event.x, event.y)
+        if self.pending is None:
+            self.schedule(None, self.flush)
+        self.pending = vertex, *self.to_world(event.x, event.y)
+
+    @timed()
+    def flush(self):
+        """Apply the last motion event received since the previous frame."""
+        if self.pending is None:
+            return
+        vertex, x, y = self.pending
+        self.pending = None
+        vertex.moveto(x, y)
+        if vertex.oval is None and self.raster_item is not None:
+            self.schedule_render()
+        self.redraw_edges()
 
     def unchoose(self, event):
         self.unbind("<B1-Motion>")
 
     def choose(self, event):
-        target = self.find_target(event.x, event.y)
-        if target is None:
+        vertex = self.find_target(event.x, event.y)
+        if vertex is None:
             return
-        vertex = self.vertices_by_figID[target]
         self.update(vertex, event)
         self.bind("<B1-Motion>", partial(self.update, vertex))
 
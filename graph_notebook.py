@@ -1,15 +1,23 @@
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk
-from tkinter import filedialog
-from typing import Literal
+from tkinter import filedialog, messagebox
+from typing import TYPE_CHECKING, Literal, Sequence
+from weakref import WeakValueDictionary
 from exceptions import BadFile
-from graph_canvas import Graph_canvas
-from file_parcer import read_adjacency, read_weighted
 
-from my_graph import Graph
 from custom_notebook import CustomNotebook
 
+# the canvas, the graph algorithms and the worker pool are imported on
+# first use, so the window shows before they are loaded
+if TYPE_CHECKING:
+    from my_graph import Graph
+
+# vertices and edges kept as canvases across all notebooks
+CANVAS_BUDGET = 200_000
+
 
 class Graph_opener(tk.Frame):
     def __init__(self, master, *args, **kwargs):
@@ -19,53 +27,169 @@ class Graph_opener(tk.Frame):
         tk.Button(self, text="Открыть матрицу весов", command=self.open_weight).pack()
     
     def open_adj(self):
-        path = filedialog.askopenfilenames(initialdir=".")[0]
-        self.master.open(path, "adj")
+        paths = filedialog.askopenfilenames(initialdir=".")
+        self.master.open(paths, "adj")
     
     def open_weight(self):
-        path = filedialog.askopenfilenames(initialdir=".")[0]
-        self.master.open(path, "weight")
+        paths = filedialog.askopenfilenames(initialdir=".")
+        self.master.open(paths, "weight")
+
+
+class Graph_tab(tk.Frame):
+    """Notebook page of a graph whose canvas exists only while needed.
+
+    The canvas is built when the page is first shown. Pages that are not
+    shown are unloaded, least recently shown first, while the canvases of
+    all pages hold more than CANVAS_BUDGET vertices and edges; an
+    unloaded page keeps the positions and zoom to rebuild the canvas.
+    A page whose canvas runs analyses is kept until they finish, as
+    destroying the canvas would cancel them.
+    """
+    loaded: 'OrderedDict[Graph_tab, None]' = OrderedDict()
+
+    def __init__(self, master: 'Graph_notebook', graph: 'Graph'):
+        super().__init__(master.notebook)
+        self.owner = master
+        self.graph = graph
+        # counted on the arrays: a loaded graph builds its dicts only
+        # once its canvas is drawn
+        frozen = graph.freeze()
+        self.size = len(frozen) + len(frozen.targets)
+        self.canvas = self.view = None
+
+    def show(self):
+        if self.canvas is None:
+            from graph_canvas import Graph_canvas
+            self.canvas = Graph_canvas(self, self.graph, self.view)
+            self.canvas.pack(fill=tk.BOTH, expand=True)
+            self.canvas.bind("<<AnalysisFinished>>", 
+                             lambda event: Graph_tab.enforce_budget())
+            self.view = None
+        Graph_tab.loaded[self] = None
+        Graph_tab.loaded.move_to_end(self)
+        Graph_tab.enforce_budget()
+
+    def unload(self):
+        if self.canvas is not None:
+            self.view = self.canvas.view()
+            self.canvas.destroy()
+            self.canvas = None
+        Graph_tab.loaded.pop(self, None)
+
+    def hidden(self) -> bool:
+        return self.owner.notebook.select() != str(self)
+
+    def busy(self) -> bool:
+        return self.canvas is not None and bool(self.canvas.analyses)
+
+    @classmethod
+    def enforce_budget(cls):
+        total = sum(tab.size for tab in cls.loaded)
+        for tab in list(cls.loaded):
+            if total <= CANVAS_BUDGET:
+                break
+            if tab.hidden() and not tab.busy():
+                total -= tab.size
+                tab.unload()
+
+    def add_tab(self, graph: 'Graph', name: str, select: bool=True):
+        self.owner.add_tab(graph, name, select)
+
+    def destroy(self):
+        Graph_tab.loaded.pop(self, None)
+        self.canvas = self.graph = None
+        super().destroy()
 
 
 class Graph_notebook(tk.Frame):
+    # graphs of open files, shared by the tabs of both notebooks
+    opened: 'WeakValueDictionary[tuple, Graph]' = WeakValueDictionary()
 
     def __init__(self, master):
         super().__init__(master)
 
         self.notebook = CustomNotebook(self, height=400, width=400)
         self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook.bind("<<NotebookTabChanged>>", self.tab_changed)
 
         open_graph = Graph_opener(self)
         open_graph.pack(fill=tk.BOTH, expand=True)
 
         self.notebook.add(open_graph, text="+")
+        self.loading = 0
+        self.failures = list()
+
+    @property
+    def graph(self) -> 'Graph | None':
+        """Graph of the selected tab."""
+        tab = self.nametowidget(self.notebook.select()) if self.notebook.select() else None
+        return tab.graph if isinstance(tab, Graph_tab) else None
+
+    def tab_changed(self, event):
+        tab = self.nametowidget(self.notebook.select()) if self.notebook.select() else None
+        if isinstance(tab, Graph_tab):
+            tab.show()
     
-    def open_graph(self, path: str, how: Literal['adj', 'weight']) -> Graph:
-        match how:
-            case 'adj':
-                matrix = read_adjacency(path)
-                graph = Graph.from_adjacency(matrix)
-            case "weight":
-                matrix = read_weighted(path)
-                graph = Graph.from_weights(matrix)
-        return graph
+    def file_key(self, path: str, how: Literal['adj', 'weight']) -> tuple:
+        stat = Path(path).stat()
+        return str(Path(path).resolve()), how, stat.st_mtime_ns, stat.st_size
     
-    def add_tab(self, graph: Graph, name: str):
-        canvas = Graph_canvas(self, graph)
-        canvas.pack(fill=tk.BOTH, expand=True)
-
-        self.notebook.add(canvas, text=name)
-        self.notebook.select(self.notebook.tabs()[-1])
+    def add_tab(self, graph: 'Graph', name: str, select: bool=True):
+        """Add a tab; its canvas is built once the tab is selected."""
+        self.notebook.add(Graph_tab(self, graph), text=name)
+        if select:
+            self.notebook.select(self.notebook.tabs()[-1])
 
     
-    def open(self, path: str, how: Literal['adj', 'weight']):
+    def open(self, paths: Sequence[str], how: Literal['adj', 'weight']):
+        """Parse the files in worker processes and add a tab for each one
+        as soon as it is ready; files that fail are reported together
+        once all files being loaded are done. The graphs come back as
+        arrays, cheap to unpickle, and are thawed when first shown."""
+        from my_graph import Graph
+        from workers import runner
+        for path in paths:
+            try:
+                key = self.file_key(path, how)
+            except OSError as e:
+                self.failed(path, e)
+                continue
+            graph = Graph_notebook.opened.get(key)
+            if graph is not None:
+                self.add_tab(graph, Path(path).name, select=self.graph is None)
+                continue
+            self.loading += 1
+            runner.submit(self, Graph.load, path, how,
+                          on_done=partial(self.loaded, path, key),
+                          on_error=partial(self.load_failed, path))
+        self.report()
+
+    def loaded(self, path: str, key: tuple, graph: 'Graph'):
+        self.loading -= 1
+        graph = Graph_notebook.opened.setdefault(key, graph)
+        # the first graph of a batch is shown, the others wait in their tabs
+        self.add_tab(graph, Path(path).name, select=self.graph is None)
+        self.report()
+
+    def load_failed(self, path: str, error: BaseException):
+        self.loading -= 1
         try:
-            self.graph = self.open_graph(path, how)
-        except BadFile as e:
-            tk.messagebox.showerror(title=e.__doc__, message=e)
-            raise
-        name = Path(path).name
-        self.add_tab(self.graph, name)
+            self.failed(path, error)
+        finally:
+            # the other files are reported even when this error is raised
+            self.report()
+
+    def failed(self, path: str, error: BaseException):
+        if not isinstance(error, (BadFile, OSError)):
+            raise error
+        self.failures.append((path, error))
+
+    def report(self):
+        if self.loading or not self.failures:
+            return
+        message = "\n".join(f"{Path(path).name}: {error}" for path, error in self.failures)
+        self.failures.clear()
+        messagebox.showerror(title=BadFile.__doc__, message=message)
         
 
 
@@ -0,0 +1,229 @@
+"""Graph analyses from the command line, without Tk.
+
+    python -m graph_painter analyze FILE... [--kind adj|weight]
+                            [--analyses dedstar distances reachability
+                                        spanning_tree isomorphism]
+                            [--source VERTEX] [--algorithm prim|kruskal]
+                            [--format jsonl|csv|npy] [--output DIR] [--jobs N]
+
+Files are matrix files (adjacency or weights, see --kind) or binary
+graph files. With the jsonl format every result is streamed to stdout as
+JSON lines, a matrix one row per line. With csv and npy every result of
+a file goes to its own file in the output directory, named after the
+input and the analysis; npy covers the matrices (vertex names go to a
+.names.txt beside them), the other results are written as CSV.
+
+Files are processed by `--jobs` worker processes. The isomorphism
+analysis puts every file in a class of isomorphic graphs, named after
+the first file of the class; only files with equal invariants (see
+classification.py) are compared in full. A file that cannot be read is reported on
+stderr and the exit status is 1; the other files are still processed.
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from math import inf, isinf
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal, Sequence, TextIO
+
+from classification import digest, group
+from exceptions import BadFile
+from export import write_binary, write_csv
+from my_graph import Graph
+
+Format = Literal["jsonl", "csv", "npy"]
+
+ANALYSES = ("dedstar", "distances", "reachability", "spanning_tree", "isomorphism")
+MATRICES = ("distances", "reachability")
+
+
+def json_number(value: float) -> float | None:
+    return None if isinf(value) else value
+
+def positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{text} is not a positive number")
+    return value
+
+def records(graph: Graph, analysis: str, source: str | None,
+            algorithm: str) -> tuple[list[str], Iterable[tuple]]:
+    """Header and rows of a result that is not a matrix."""
+    match analysis:
+        case "dedstar":
+            if source is not None and source not in graph.vertices():
+                raise ValueError(f"No vertex {source!r}")
+            if not graph.vertices():
+                return ["vertex", "distance"], ()
+            distances = graph.dedstar(source)
+            return ["vertex", "distance"], ((vertex, distances.get(vertex, inf))
+                                            for vertex in sorted(graph.vertices()))
+        case "spanning_tree":
+            tree = graph.min_spanning_tree(None, algorithm)
+            return ["start", "end", "weight"], ((start, end, tree.min_weight(start, end))
+                                                for start in sorted(tree.vertices())
+                                                for end in sorted(tree.list_adjacent(start))
+                                                # an undirected edge is kept in both directions
+                                                if start <= end 
+                                                or start not in tree.list_adjacent(end))
+    raise ValueError(f"Unknown analysis: {analysis}")
+
+def matrix(graph: Graph, analysis: str, jobs: int | None) -> tuple[list[str], Sequence]:
+    if analysis == "distances":
+        return graph.all_distances(jobs)
+    return graph.reachability_matrix()
+
+def write_jsonl(out: TextIO, path: str, analysis: str, graph: Graph,
+                source: str | None, algorithm: str, jobs: int | None):
+    line = lambda record: print(json.dumps({"file": path, "analysis": analysis, **record},
+                                           ensure_ascii=False), file=out)
+    if analysis in MATRICES:
+        names, rows = matrix(graph, analysis, jobs)
+        line({"names": names})
+        for name, row in zip(names, rows):
+            line({"vertex": name, "row": [json_number(value) for value in row]})
+        return
+    header, rows = records(graph, analysis, source, algorithm)
+    for row in rows:
+        line({key: json_number(value) if isinstance(value, float) else value
+              for key, value in zip(header, row)})
+
+def write_files(directory: str, path: str, analysis: str, graph: Graph,
+                format: Format, source: str | None, algorithm: str,
+                jobs: int | None) -> list[str]:
+    stem = os.path.join(directory, f"{Path(path).name}.{analysis}")
+    if analysis in MATRICES:
+        names, rows = matrix(graph, analysis, jobs)
+        if format == "csv":
+            write_csv(f"{stem}.csv", names, rows)
+            return [f"{stem}.csv"]
+        write_binary(f"{stem}.npy", rows)
+        with open(f"{stem}.names.txt", "w") as file:
+            file.writelines(f"{name}\n" for name in names)
+        return [f"{stem}.npy", f"{stem}.names.txt"]
+    header, rows = records(graph, analysis, source, algorithm)
+    with open(f"{stem}.csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return [f"{stem}.csv"]
+
+def analyze_file(path: str, kind: Literal["adj", "weight"], analyses: list[str],
+                 format: Format, output: str, source: str | None, algorithm: str,
+                 jobs: int | None) -> tuple[str | None, bytes | None]:
+    """Run the analyses of one file; returns the file the JSON lines went
+    to (for the jsonl format) and the invariant digest when asked for."""
+    graph = Graph.load(path, kind)
+    lines = None
+    if format == "jsonl":
+        descriptor, lines = tempfile.mkstemp(suffix=".jsonl", dir=output)
+        out = open(descriptor, "w")
+    try:
+        for analysis in analyses:
+            if analysis == "isomorphism":
+                continue
+            if format == "jsonl":
+                write_jsonl(out, path, analysis, graph, source, algorithm, jobs)
+            else:
+                write_files(output, path, analysis, graph, format, source, algorithm, jobs)
+    finally:
+        if format == "jsonl":
+            out.close()
+    return lines, digest(graph) if "isomorphism" in analyses else None
+
+def load_file(item: tuple[str, Literal["adj", "weight"]]) -> Graph:
+    return Graph.load(*item)
+
+def classes(args: argparse.Namespace, digests: dict[str, bytes]) -> dict[str, str]:
+    """First file of the isomorphism class of every file."""
+    paths = [path for path in args.files if path in digests]
+    first = dict()
+    for members in group([(path, args.kind) for path in paths],
+                         [digests[path] for path in paths], load_file, args.jobs):
+        for i in members:
+            first[paths[i]] = paths[members[0]]
+    return {path: first[path] for path in paths}
+
+def outcomes(args: argparse.Namespace,
+             directory: str) -> Iterator[tuple[str, Callable[[], tuple]]]:
+    """Files with a call returning their result, in the order they finish."""
+    if args.jobs == 1:
+        for path in args.files:
+            yield path, partial(analyze_file, path, args.kind, args.analyses,
+                                args.format, directory, args.source,
+                                args.algorithm, None)
+        return
+    with ProcessPoolExecutor(args.jobs) as pool:
+        # every worker computes its distance matrices on one core
+        futures = {pool.submit(analyze_file, path, args.kind, args.analyses,
+                               args.format, directory, args.source,
+                               args.algorithm, 1): path
+                   for path in args.files}
+        for future in as_completed(futures):
+            yield futures[future], future.result
+
+def analyze(args: argparse.Namespace) -> int:
+    analyses = args.analyses
+    output = args.output
+    if args.format != "jsonl":
+        os.makedirs(output, exist_ok=True)
+    failed = 0
+    digests = dict()
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = scratch if args.format == "jsonl" else output
+        for path, result in outcomes(args, directory):
+            try:
+                lines, key = result()
+            except (BadFile, OSError, ValueError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            if lines is not None:
+                with open(lines) as file:
+                    shutil.copyfileobj(file, sys.stdout)
+                os.remove(lines)
+                sys.stdout.flush()
+            if key is not None:
+                digests[path] = key
+
+    if "isomorphism" in analyses:
+        first = classes(args, digests)
+        if args.format == "jsonl":
+            for path, same_as in first.items():
+                print(json.dumps({"file": path, "analysis": "isomorphism",
+                                  "class": same_as}, ensure_ascii=False))
+        else:
+            with open(os.path.join(output, "isomorphism.csv"), "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["file", "class"])
+                writer.writerows(first.items())
+    return 1 if failed else 0
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m graph_painter")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("analyze", help="analyse graph files")
+    command.add_argument("files", nargs="+")
+    command.add_argument("--kind", choices=["adj", "weight"], default="adj",
+                         help="what the matrix files hold")
+    command.add_argument("--analyses", nargs="+", choices=ANALYSES,
+                         default=list(ANALYSES))
+    command.add_argument("--source", help="start vertex of dedstar")
+    command.add_argument("--algorithm", choices=["prim", "kruskal"], default="prim")
+    command.add_argument("--format", choices=["jsonl", "csv", "npy"], default="jsonl")
+    command.add_argument("--output", default=".",
+                         help="directory of the csv and npy files")
+    command.add_argument("--jobs", type=positive_int, default=1)
+    args = parser.parse_args(argv)
+    return analyze(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
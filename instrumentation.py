@@ -0,0 +1,144 @@
+"""Opt-in timers and counters for the hot paths of the application.
+
+Recording is off unless the GRAPH_PAINTER_PROFILE environment variable is
+set or it is switched on from the menu; while off, spans and counters
+cost one attribute check. A span times a block of work and keeps the
+counters incremented inside it (relaxations, heap pushes, cache hits,
+canvas items created), so a slow operation shows where its time went.
+The last `history` spans can be exported as JSON or as a Chrome trace
+(chrome://tracing, Perfetto).
+
+Work done in a worker process is recorded in that process only; the UI
+side sees it as the span around the whole job.
+"""
+import json
+import os
+import threading
+from collections import Counter, deque
+from functools import wraps
+from time import perf_counter
+from typing import Callable
+
+ENV = "GRAPH_PAINTER_PROFILE"
+
+
+class Span:
+
+    def __init__(self, recorder: 'Recorder', name: str, nested: bool=True):
+        self.recorder = recorder
+        self.name = name
+        self.nested = nested
+        self.begin = self.duration = None
+        self.thread = 0
+        self.counters = Counter()
+
+    def start(self) -> 'Span':
+        if self.recorder.enabled:
+            self.begin = perf_counter()
+            if self.nested:
+                self.thread = threading.get_ident()
+                self.recorder.stack().append(self)
+        return self
+
+    def stop(self):
+        if self.begin is None:
+            return
+        self.duration = perf_counter() - self.begin
+        stack = self.recorder.stack()
+        if self in stack:
+            stack.remove(self)
+            if stack:
+                stack[-1].counters.update(self.counters)
+        self.recorder.finish(self)
+
+    def __enter__(self) -> 'Span':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class Recorder:
+
+    def __init__(self, enabled: bool=False, history: int=500):
+        self.enabled = enabled
+        self.spans = deque(maxlen=history)
+        self.counters = Counter()
+        self.origin = perf_counter()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def stack(self) -> list[Span]:
+        if not hasattr(self.local, "stack"):
+            self.local.stack = list()
+        return self.local.stack
+
+    def span(self, name: str, nested: bool=True) -> Span:
+        """Span of `name`; spans that are not nested (say, waiting for a
+        worker across Tk callbacks) do not collect the counters of the
+        work done meanwhile."""
+        return Span(self, name, nested)
+
+    def count(self, name: str, n: int=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += n
+        stack = self.stack()
+        if stack:
+            stack[-1].counters[name] += n
+
+    def timed(self, name: str=None) -> Callable:
+        """Decorator recording every call of a function as a span."""
+        def decorator(function: Callable) -> Callable:
+            label = name or function.__qualname__
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self.span(label):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def finish(self, span: Span):
+        with self.lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        return {"counters": counters,
+                "spans": [{"name": span.name,
+                           "start": span.begin - self.origin,
+                           "duration": span.duration,
+                           "counters": dict(span.counters)} for span in spans]}
+
+    def chrome_trace(self) -> dict:
+        with self.lock:
+            spans = list(self.spans)
+        return {"traceEvents": [{"name": span.name, "ph": "X", "pid": os.getpid(),
+                                 "tid": span.thread, "ts": (span.begin - self.origin) * 10**6,
+                                 "dur": span.duration * 10**6,
+                                 "args": dict(span.counters)} for span in spans],
+                "displayTimeUnit": "ms"}
+
+    def export_json(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=1)
+
+    def export_chrome_trace(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+
+recorder = Recorder(enabled=bool(os.environ.get(ENV)))
+span = recorder.span
+count = recorder.count
+timed = recorder.timed
@@ -0,0 +1,195 @@
+"""Canonical labelling of graphs by colour refinement and individualisation.
+
+The search follows the nauty scheme: the vertex partition is refined with
+Weisfeiler-Lehman colour refinement, a vertex of the first non-singleton
+cell is individualised and the process repeats until the partition is
+discrete. Every discrete partition gives a relabelling of the graph; the
+smallest one (together with the refinement trace leading to it) is the
+canonical form. Equal leaves reveal automorphisms, which prune branches
+that are images of already explored ones.
+"""
+from collections import defaultdict
+from typing import Callable, Hashable
+
+from disjoint_set import Disjoint_set
+
+Colouring = list[int]
+Adjacency = list[list[tuple[int, int]]]
+
+
+def structure(graph) -> tuple[list[str], Adjacency, Adjacency, tuple]:
+    """Integer adjacency of `graph` with edges labelled by their data."""
+    names = set(graph.edges)
+    for adjacent in graph.edges.values():
+        names.update(adjacent)
+    names = sorted(names)
+    index = {name: i for i, name in enumerate(names)}
+
+    edges = list()
+    for start, adjacent in graph.edges.items():
+        for end, edge in adjacent.items():
+            data = tuple(sorted((w, c) for w, c in edge.items() if c))
+            if data:
+                edges.append((index[start], index[end], data))
+    labels = tuple(sorted({data for *_, data in edges}))
+    label_index = {data: i for i, data in enumerate(labels)}
+
+    out = [[] for _ in names]
+    inp = [[] for _ in names]
+    for start, end, data in edges:
+        out[start].append((end, label_index[data]))
+        inp[end].append((start, label_index[data]))
+    return names, out, inp, labels
+
+
+def views(out: Adjacency, inp: Adjacency, n_labels: int) -> list[list[list[int]]]:
+    """Neighbour lists of every vertex split by edge label and direction.
+
+    The incoming lists are dropped for symmetric graphs, where they
+    repeat the outgoing ones.
+    """
+    directions = [out]
+    if any(sorted(o) != sorted(i) for o, i in zip(out, inp)):
+        directions.append(inp)
+    result = list()
+    for adjacency in directions:
+        for label in range(n_labels):
+            result.append([[u for u, l in adjacent if l == label]
+                           for adjacent in adjacency])
+    return result
+
+
+def refine(colours: Colouring, views: list[list[list[int]]],
+           bound: tuple=None, 
+           accept: Callable[[Colouring], bool]=None) -> tuple[Colouring, tuple] | None:
+    """Equitable refinement of `colours` and the trace of its rounds.
+
+    The trace is compared round by round with `bound`, the trace of the
+    best node at the same depth; refinement stops early and returns None
+    as soon as it is known to be greater, or as soon as `accept` rejects
+    the colours of a round.
+    """
+    trace = list()
+    n_cells = len(set(colours))
+    while True:
+        colour = colours.__getitem__
+        signatures = list(zip(colours, *[
+            [tuple(sorted(map(colour, targets))) for targets in view]
+            for view in views]))
+        cells = sorted(set(signatures))
+        rank = {signature: i for i, signature in enumerate(cells)}
+        colours = [rank[signature] for signature in signatures]
+        trace.append(hash(tuple(cells)))
+        if accept is not None and not accept(colours):
+            return None
+        if bound is not None:
+            r = len(trace) - 1
+            if r >= len(bound) or trace[r] > bound[r]:
+                return None
+            if trace[r] < bound[r]:
+                bound = None
+        if len(cells) == n_cells:
+            return colours, tuple(trace)
+        n_cells = len(cells)
+
+
+class _Search:
+
+    def __init__(self, out: Adjacency, views: list[list[list[int]]]):
+        self.out, self.views = out, views
+        self.size = len(out)
+        self.first = self.best = None
+        self.automorphisms = list()
+
+    def certificate(self, order: Colouring) -> tuple:
+        return tuple(sorted((order[v], order[u], l)
+                            for v in range(self.size)
+                            for u, l in self.out[v]))
+
+    def automorphism(self, order: Colouring, other: Colouring) -> list[int]:
+        position = {p: v for v, p in enumerate(other)}
+        return [position[p] for p in order]
+
+    def leaf(self, path: tuple, fixed: tuple[int, ...],
+             order: Colouring) -> int | None:
+        """Record a leaf; on an automorphism return the depth to resume at."""
+        leaf = (path, self.certificate(order)), fixed, order
+        if self.first is None:
+            self.first = self.best = leaf
+            return None
+        for known in self.first, self.best:
+            if leaf[0] == known[0]:
+                self.automorphisms.append(self.automorphism(order, known[2]))
+                depth = 0
+                while fixed[depth:depth+1] == known[1][depth:depth+1]:
+                    depth += 1
+                return depth
+        if leaf[0] < self.best[0]:
+            self.best = leaf
+        return None
+
+    def orbits(self, fixed: tuple[int, ...], orbits: Disjoint_set,
+               known: int) -> int:
+        """Merge into `orbits` the automorphisms found since the `known`-th
+        that fix every vertex of `fixed`; return the new count."""
+        for gamma in self.automorphisms[known:]:
+            if all(gamma[v] == v for v in fixed):
+                for v, image in enumerate(gamma):
+                    if v != image:
+                        orbits.union(v, image)
+        return len(self.automorphisms)
+
+    def run(self, colours: Colouring, path: tuple=(),
+            fixed: tuple[int, ...]=()) -> int | None:
+        """Search the subtree of a node; a returned depth unwinds the search."""
+        depth = len(fixed)
+        bound = None
+        if self.best is not None:
+            best_path = self.best[0][0]
+            if path == best_path[:depth]:
+                if depth == len(best_path):
+                    return None
+                bound = best_path[depth]
+        refined = refine(colours, self.views, bound)
+        if refined is None:
+            return None
+        colours, trace = refined
+        path = path + (trace,)
+        cells = defaultdict(list)
+        for v, colour in enumerate(colours):
+            cells[colour].append(v)
+        if len(cells) == self.size:
+            return self.leaf(path, fixed, colours)
+
+        target = min(c for c, cell in cells.items() if len(cell) > 1)
+        orbits, known = Disjoint_set(self.size), 0
+        tried = set()
+        for v in cells[target]:
+            known = self.orbits(fixed, orbits, known)
+            if orbits.find(v) in {orbits.find(u) for u in tried}:
+                continue
+            tried.add(v)
+            individualised = [2*c + (u != v) for u, c in enumerate(colours)]
+            resume = self.run(individualised, path, fixed + (v,))
+            if resume is not None and resume < depth:
+                return resume
+        return None
+
+
+def canonical_labelling(graph) -> tuple[list[str], tuple]:
+    """Vertex names in canonical order and the canonical label of `graph`."""
+    names, out, inp, labels = structure(graph)
+    if not names:
+        return names, (0, labels, ())
+    search = _Search(out, views(out, inp, len(labels)))
+    search.run([0] * len(names))
+    (_, certificate), _, order = search.best
+    ordered = [None] * len(names)
+    for name, position in zip(names, order):
+        ordered[position] = name
+    return ordered, (len(names), labels, certificate)
+
+
+def canonical_label(graph) -> Hashable:
+    """Hashable value that is equal for two graphs iff they are isomorphic."""
+    return canonical_labelling(graph)[1]
@@ -0,0 +1,326 @@
+"""Placing the vertices of a Frozen_graph on the plane.
+
+Layouts share one interface: `step()` advances by one iteration, `run()`
+and `frames()` repeat it within an iteration and/or time budget, and
+`positions()` returns the coordinates in the vertex order of the graph.
+`Layout_thread` runs `frames()` off the Tk thread and keeps the latest
+frame for the canvas to pick up.
+
+Force-directed layouts treat every edge as undirected. With NumPy the
+repulsion is approximated with a Barnes-Hut quadtree, built and walked
+level by level on whole arrays of (vertex, cell) pairs, so an iteration
+costs O(n log n). Without NumPy all pairs are computed exactly, which
+is only practical for a few hundred vertices.
+"""
+import threading
+from cmath import rect
+from collections import deque
+from math import ceil, hypot, inf, log, pi, sqrt
+from random import Random
+from time import perf_counter
+from typing import Iterator, Literal
+
+from matrices import np
+
+Name = Literal["circle", "fruchterman_reingold", "force_atlas"]
+Point = tuple[float, float]
+
+MAX_DEPTH = 12
+
+
+class Layout:
+
+    def __init__(self, frozen, positions: list[Point]=None, size: float=1000.0):
+        self.frozen = frozen
+        self.size = size
+        self.iteration = 0
+        if positions is None:
+            rnd = Random(0)
+            positions = [(rnd.uniform(0, size), rnd.uniform(0, size))
+                         for _ in range(len(frozen))]
+        self.xs = [x for x, _ in positions]
+        self.ys = [y for _, y in positions]
+
+    @property
+    def done(self) -> bool:
+        return True
+
+    def step(self):
+        self.iteration += 1
+
+    def positions(self) -> list[Point]:
+        return list(zip(self.xs, self.ys))
+
+    def frames(self, iterations: int=None, seconds: float=None,
+               frame: float=0.03) -> Iterator[list[Point]]:
+        """Positions after every `frame` seconds of work, until the layout
+        settles or the budget runs out."""
+        start = perf_counter()
+        last = self.iteration + iterations if iterations is not None else None
+        while True:
+            shown = perf_counter()
+            while True:
+                if self.done or self.iteration == last:
+                    yield self.positions()
+                    return
+                if seconds is not None and perf_counter() - start >= seconds:
+                    yield self.positions()
+                    return
+                self.step()
+                if perf_counter() - shown >= frame:
+                    break
+            yield self.positions()
+
+    def run(self, iterations: int=None, seconds: float=None) -> list[Point]:
+        for positions in self.frames(iterations, seconds, frame=inf):
+            pass
+        return positions
+
+
+class Layout_thread(threading.Thread):
+    """Runs the frames of a layout in the background; frames that were
+    not taken before the next one is ready are dropped."""
+
+    def __init__(self, layout: Layout, seconds: float=None):
+        super().__init__(daemon=True)
+        self.layout = layout
+        self.seconds = seconds
+        self.latest = deque(maxlen=1)
+        self.stopped = threading.Event()
+
+    def run(self):
+        for positions in self.layout.frames(seconds=self.seconds):
+            if self.stopped.is_set():
+                return
+            self.latest.append(positions)
+
+    def take(self) -> list[Point] | None:
+        """The newest frame not taken yet."""
+        try:
+            return self.latest.popleft()
+        except IndexError:
+            return None
+
+    def stop(self):
+        self.stopped.set()
+
+
+class Circle(Layout):
+
+    def __init__(self, frozen, positions: list[Point]=None, size: float=1000.0):
+        n = len(frozen)
+        super().__init__(frozen, [(0.0, 0.0)] * n, size)
+        for i in range(n):
+            xy = rect(size/2, i*pi*2/n - pi/2)
+            self.xs[i], self.ys[i] = xy.real + size/2, xy.imag + size/2
+
+
+class Fruchterman_reingold(Layout):
+    """Every pair of vertices repels with k²/d and the ends of an edge
+    attract with d²/k; moves are limited by a temperature that cools
+    geometrically."""
+
+    cooling = 0.98
+
+    def __init__(self, frozen, positions: list[Point]=None, size: float=1000.0,
+                 theta: float=0.8):
+        super().__init__(frozen, positions, size)
+        self.theta = theta
+        self.k = size / sqrt(max(len(frozen), 1))
+        self.temperature = size / 10
+        starts = [v for v in range(len(frozen))
+                  for _ in range(frozen.offsets[v+1] - frozen.offsets[v])]
+        self.edges = [(start, end) for start, end in zip(starts, frozen.targets)
+                      if start != end]
+        degree = [0] * len(frozen)
+        for start, end in self.edges:
+            degree[start] += 1
+            degree[end] += 1
+        self.charge = self.charges(degree)
+        # scaled so that vertices of average charge settle about k apart
+        self.repulsion = (self.k * len(frozen) / max(sum(self.charge), 1e-12))**2
+        if np is not None:
+            self.xy = np.array([self.xs, self.ys], dtype=float).T.reshape(-1, 2)
+            self.edge_array = np.array(self.edges, dtype=np.int64).reshape(-1, 2)
+            self.charge_array = np.array(self.charge, dtype=float)
+
+    def charges(self, degree: list[int]) -> list[float]:
+        return [1.0] * len(degree)
+
+    def attraction(self, distance):
+        return distance * distance / self.k
+
+    def gravity(self, xy):
+        return 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.temperature < self.size / 10**4 or len(self.frozen) < 2
+
+    def step(self):
+        if np is not None:
+            force = self.array_forces()
+        else:
+            force = self.python_forces()
+        if np is not None:
+            length = np.maximum(np.hypot(force[:, 0], force[:, 1]), 1e-12)
+            self.xy += force / length[:, None] * np.minimum(length, self.temperature)[:, None]
+        else:
+            for i, (fx, fy) in enumerate(force):
+                length = max(hypot(fx, fy), 1e-12)
+                move = min(length, self.temperature) / length
+                self.xs[i] += fx * move
+                self.ys[i] += fy * move
+        self.temperature *= self.cooling
+        super().step()
+
+    def positions(self) -> list[Point]:
+        if np is not None:
+            return list(map(tuple, self.xy.tolist()))
+        return super().positions()
+
+    def array_forces(self) -> 'np.ndarray':
+        xy = self.xy
+        force = barnes_hut(xy, self.charge_array, self.theta) * self.repulsion
+        start, end = self.edge_array[:, 0], self.edge_array[:, 1]
+        delta = xy[end] - xy[start]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-12)
+        pull = delta * (self.attraction(distance) / distance)[:, None]
+        for axis in 0, 1:
+            force[:, axis] += np.bincount(start, pull[:, axis], minlength=len(xy))
+            force[:, axis] -= np.bincount(end, pull[:, axis], minlength=len(xy))
+        return force + self.gravity(xy)
+
+    def python_forces(self) -> list[list[float]]:
+        xs, ys, charge, k2 = self.xs, self.ys, self.charge, self.repulsion
+        force = [[0.0, 0.0] for _ in xs]
+        for i in range(len(xs)):
+            for j in range(i+1, len(xs)):
+                dx, dy = xs[i] - xs[j], ys[i] - ys[j]
+                d2 = max(dx*dx + dy*dy, 1e-12)
+                push = k2 * charge[i] * charge[j] / d2
+                force[i][0] += dx * push
+                force[i][1] += dy * push
+                force[j][0] -= dx * push
+                force[j][1] -= dy * push
+        for start, end in self.edges:
+            dx, dy = xs[end] - xs[start], ys[end] - ys[start]
+            distance = max(hypot(dx, dy), 1e-12)
+            pull = self.attraction(distance) / distance
+            force[start][0] += dx * pull
+            force[start][1] += dy * pull
+            force[end][0] -= dx * pull
+            force[end][1] -= dy * pull
+        centre = self.size / 2
+        for i, q in enumerate(charge):
+            gx, gy = self.python_gravity(xs[i] - centre, ys[i] - centre, q)
+            force[i][0] += gx
+            force[i][1] += gy
+        return force
+
+    def python_gravity(self, dx: float, dy: float, charge: float) -> Point:
+        return 0.0, 0.0
+
+
+class Force_atlas(Fruchterman_reingold):
+    """ForceAtlas2-style forces: repulsion weighted by degree + 1, linear
+    attraction and a constant pull towards the centre. Moves use the
+    same cooling temperature instead of ForceAtlas2 adaptive speeds."""
+
+    strength = 0.05
+
+    def charges(self, degree: list[int]) -> list[float]:
+        return [d + 1.0 for d in degree]
+
+    def attraction(self, distance):
+        return distance
+
+    def gravity(self, xy):
+        delta = xy - self.size / 2
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-12)
+        pull = self.strength * self.k * self.charge_array / distance
+        return -delta * pull[:, None]
+
+    def python_gravity(self, dx: float, dy: float, charge: float) -> Point:
+        pull = self.strength * self.k * charge / max(hypot(dx, dy), 1e-12)
+        return -dx * pull, -dy * pull
+
+
+LAYOUTS = {"circle": Circle,
+           "fruchterman_reingold": Fruchterman_reingold,
+           "force_atlas": Force_atlas}
+
+
+def _children(parent: 'np.ndarray', n_parents: int) -> list['np.ndarray']:
+    order = np.argsort(parent, kind="stable")
+    first = np.searchsorted(parent[order], np.arange(n_parents))
+    return [order, first, np.diff(np.append(first, len(order)))]
+
+def _levels(xy: 'np.ndarray', charge: 'np.ndarray', depth: int) -> list[list]:
+    """Occupied cells of every quadtree level with their total charge,
+    centre of charge, population and width, plus the children of every
+    cell. The points themselves make the last level."""
+    low = xy.min(axis=0)
+    size = max(float((xy.max(axis=0) - low).max()), 1e-9) * (1 + 1e-9)
+    levels = list()
+    for level in range(depth+1):
+        side = 2**level
+        ij = np.minimum(((xy - low) / size * side).astype(np.int64), side-1)
+        keys, cell_of = np.unique(ij[:, 0]*side + ij[:, 1], return_inverse=True)
+        cell_of = cell_of.reshape(-1)
+        mass = np.bincount(cell_of, charge)
+        centre = np.stack([np.bincount(cell_of, charge*xy[:, 0]),
+                           np.bincount(cell_of, charge*xy[:, 1])], axis=1)
+        levels.append([keys, cell_of, mass, centre / mass[:, None],
+                       np.bincount(cell_of), size / side])
+    n = len(xy)
+    levels.append([None, np.arange(n), charge, xy, np.ones(n, dtype=np.int64), 0.0])
+    for level in range(depth+1):
+        parent = np.zeros(len(levels[level+1][2]), dtype=np.int64)
+        parent[levels[level+1][1]] = levels[level][1]
+        levels[level] += _children(parent, len(levels[level][2]))
+    return levels
+
+def barnes_hut(xy: 'np.ndarray', charge: 'np.ndarray', theta: float) -> 'np.ndarray':
+    """Sum over other points of charge_i·charge_j·(p_i - p_j)/d², with
+    cells narrower than `theta` times their distance taken as a whole."""
+    n = len(xy)
+    depth = max(1, min(MAX_DEPTH, ceil(log(max(n, 2), 4)) + 1))
+    levels = _levels(xy, charge, depth)
+    force = np.zeros((n, 2))
+    body = np.arange(n)
+    cell = np.zeros(n, dtype=np.int64)
+    for keys, cell_of, mass, centre, count, width, *children in levels:
+        own = cell_of[body] == cell
+        others, where = mass[cell], centre[cell]
+        mine = np.flatnonzero(own)
+        if len(mine):
+            b = body[mine]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                where[mine] = (where[mine] * others[mine, None]
+                               - charge[b, None] * xy[b]) / (others[mine] - charge[b])[:, None]
+            others[mine] -= charge[b]
+        dx, dy = xy[body, 0] - where[:, 0], xy[body, 1] - where[:, 1]
+        d2 = np.maximum(dx*dx + dy*dy, 1e-12)
+        alone = count[cell] - own <= 1
+        far = (width*width < theta*theta*d2) & ~own
+        apply = (far | alone) & (others > 1e-12)
+        target = body[apply]
+        push = charge[target] * others[apply] / d2[apply]
+        force[:, 0] += np.bincount(target, dx[apply] * push, minlength=n)
+        force[:, 1] += np.bincount(target, dy[apply] * push, minlength=n)
+        if not children:
+            break
+        opened = ~(far | alone)
+        order, first, n_children = children
+        body, cell = body[opened], cell[opened]
+        k = n_children[cell]
+        within = np.arange(k.sum()) - np.repeat(np.cumsum(k) - k, k)
+        body = np.repeat(body, k)
+        cell = order[np.repeat(first[cell], k) + within]
+    return force
+
+
+def layout(frozen, name: Name="fruchterman_reingold", iterations: int=None,
+           seconds: float=None, **kwargs) -> list[Point]:
+    return LAYOUTS[name](frozen, **kwargs).run(iterations, seconds)
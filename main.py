@@ -1,7 +1,9 @@
-from io import StringIO
+import sys
+from operator import eq
 import tkinter as tk
-from graph_canvas import Graph_canvas
+from tkinter import messagebox
 from graph_notebook import Graph_notebook
+from instrumentation import recorder
 
 class App(tk.Tk):
 
@@ -16,18 +18,50 @@ class App(tk.Tk):
         self.notebooks = Graph_notebook(left), Graph_notebook(right)
         for b in self.notebooks:
             b.pack(fill=tk.BOTH, expand=True)
+        self.protocol("WM_DELETE_WINDOW", self.close)
     
     def create_menu(self):
         menu = tk.Menu(self)
         menu.add_command(label="Изоморфность", command=self.test_equal)
+        profiling = tk.Menu(menu, tearoff=0)
+        self.profiling = tk.BooleanVar(self, value=recorder.enabled)
+        profiling.add_checkbutton(label="Записывать", variable=self.profiling,
+                                  command=self.toggle_profiling)
+        profiling.add_command(label="Статистика", command=self.show_stats)
+        menu.add_cascade(label="Профилирование", menu=profiling)
         # menu.add_command(label="Справка")
         return menu
     
     def test_equal(self):
+        from widgets import show_progress
+        from workers import runner
         left = self.notebooks[0].graph
         right = self.notebooks[1].graph
-        message = "Графы изоморфны" if left == right else "Графы не изоморны"
-        tk.messagebox.showinfo(self, message=message)
+        if left is None or right is None:
+            messagebox.showinfo(title="Изоморфность",
+                                message="Выберите граф в обеих панелях")
+            return
+        job = runner.submit(self, eq, left, right, 
+                            on_done=self.show_equal, group="isomorphism",
+                            kind="isolated")
+        show_progress(self, job, "Изоморфность")
+
+    def show_equal(self, equal: bool):
+        message = "Графы изоморфны" if equal else "Графы не изоморны"
+        messagebox.showinfo(title="Изоморфность", message=message)
+
+    def show_stats(self):
+        from widgets import show_stats
+        show_stats(self)
+
+    def toggle_profiling(self):
+        recorder.enabled = self.profiling.get()
+
+    def close(self):
+        # the pools exist only if something has been run
+        if "workers" in sys.modules:
+            sys.modules["workers"].runner.shutdown()
+        self.destroy()
 
 
 if __name__ == '__main__':
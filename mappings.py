@@ -0,0 +1,191 @@
+"""Backtracking search for vertex mappings between two graphs.
+
+Vertices of the pattern are mapped one at a time in a fixed order that
+keeps each next vertex connected to the mapped ones. Both graphs are
+coloured together: the colours start from a 1-hop invariant (in/out-degree,
+loop and the multisets of neighbour degrees and edge data) and are refined
+by `isomorphism.refine` on their disjoint union. A candidate image must
+have the colour of the vertex and agree on every edge to the vertices
+mapped so far. While colour classes hold several vertices, mapping a
+vertex individualises it and its image and refines the colours again, as
+nauty does; this is what separates the vertices of regular graphs, which
+no invariant tells apart. A partial mapping that fails, or whose colour
+classes differ in size between the graphs, is abandoned with the whole
+subtree under it. Mappings are yielded as they are found, so a caller
+that needs one stops the search there.
+"""
+from collections import Counter
+from heapq import heapify, heappop, heappush
+from typing import Generator, Hashable
+
+from instrumentation import count
+from isomorphism import Colouring, refine, structure, views
+
+Adjacency = list[dict[int, tuple]]
+
+
+def adjacency(graph) -> tuple[list[str], Adjacency, Adjacency]:
+    """Outgoing and incoming neighbours of every vertex with edge data."""
+    names, out, inp, labels = structure(graph)
+    return (names,
+            [{u: labels[l] for u, l in adjacent} for adjacent in out],
+            [{u: labels[l] for u, l in adjacent} for adjacent in inp])
+
+
+def invariants(out: Adjacency, inp: Adjacency) -> list[Hashable]:
+    degree = [(len(o), len(i)) for o, i in zip(out, inp)]
+    return [(degree[v], out[v].get(v),
+             tuple(sorted((data, degree[u]) for u, data in out[v].items())),
+             tuple(sorted((data, degree[u]) for u, data in inp[v].items())))
+            for v in range(len(out))]
+
+
+def joint_views(out: Adjacency, inp: Adjacency, target_out: Adjacency,
+                target_inp: Adjacency) -> list[list[list[int]]]:
+    """`isomorphism.views` of the disjoint union of both graphs; the target
+    vertices are numbered after the pattern ones."""
+    size = len(out)
+    labels = dict()
+    def numbered(adjacency: Adjacency, shift: int) -> list[list[tuple[int, int]]]:
+        return [[(u + shift, labels.setdefault(data, len(labels))) 
+                 for u, data in adjacent.items()] for adjacent in adjacency]
+    joint_out = numbered(out, 0) + numbered(target_out, size)
+    joint_inp = numbered(inp, 0) + numbered(target_inp, size)
+    return views(joint_out, joint_inp, len(labels))
+
+
+def balanced(colours: Colouring) -> bool:
+    """Whether every colour has as many pattern vertices as target ones."""
+    size = len(colours) // 2
+    return Counter(colours[:size]) == Counter(colours[size:])
+
+
+def search_order(out: Adjacency, inp: Adjacency,
+                 rarity: list[int]) -> list[int]:
+    """Vertices starting from the rarest invariant, each next one with the
+    most edges to the already ordered ones (then the rarest)."""
+    links = [0] * len(out)
+    placed = [False] * len(out)
+    heap = [(0, rarity[u], u) for u in range(len(out))]
+    heapify(heap)
+    order = list()
+    while heap:
+        n_links, _, v = heappop(heap)
+        if placed[v] or -n_links != links[v]:
+            continue
+        placed[v] = True
+        order.append(v)
+        for u in set(out[v]) | set(inp[v]):
+            if not placed[u]:
+                links[u] += 1
+                heappush(heap, (-links[u], rarity[u], u))
+    return order
+
+
+def vertex_mappings(pattern, target) -> Generator[dict[str, str], None, None]:
+    """Isomorphisms of `pattern` onto `target` as {pattern name: target name}."""
+    names, out, inp = adjacency(pattern)
+    target_names, target_out, target_inp = adjacency(target)
+    size = len(names)
+    if size != len(target_names):
+        return
+    key = invariants(out, inp)
+    target_key = invariants(target_out, target_inp)
+    if Counter(key) != Counter(target_key):
+        return
+    if not size:
+        yield {}
+        return
+
+    view = joint_views(out, inp, target_out, target_inp)
+    rank = {invariant: i for i, invariant in enumerate(set(key))}
+    refined = refine([rank[invariant] for invariant in key + target_key], view,
+                     accept=balanced)
+    if refined is None:
+        return
+    colours, _ = refined
+    classes = Counter(colours[:size])
+    order = search_order(out, inp, [classes[colour] for colour in colours[:size]])
+    position = {v: i for i, v in enumerate(order)}
+    # edges to the vertices placed earlier, as (vertex, data) pairs
+    back_out = [[(u, data) for u, data in out[v].items() if position[u] < position[v]]
+                for v in order]
+    back_in = [[(u, data) for u, data in inp[v].items() if position[u] < position[v]]
+               for v in order]
+
+    image = [None] * size
+    used = [False] * size
+    # colours in force at every depth and the size of their classes
+    colourings = [colours] + [None] * size
+    class_sizes = [classes] + [None] * size
+    explored = refinements = 0
+
+    def candidates(depth: int) -> list[int]:
+        v = order[depth]
+        colours = colourings[depth]
+        colour = colours[v]
+        if back_out[depth]:
+            u, _ = back_out[depth][0]
+            near = target_inp[image[u]]
+        elif back_in[depth]:
+            u, _ = back_in[depth][0]
+            near = target_out[image[u]]
+        else:
+            near = range(size)
+        return [w for w in near if colours[size + w] == colour]
+
+    def feasible(depth: int, w: int) -> bool:
+        if used[w]:
+            return False
+        edges_out, edges_in = target_out[w], target_inp[w]
+        for u, data in back_out[depth]:
+            if edges_out.get(image[u]) != data:
+                return False
+        for u, data in back_in[depth]:
+            if edges_in.get(image[u]) != data:
+                return False
+        # no edges between w and mapped vertices beyond the matched ones
+        return sum(used[x] for x in edges_out) == len(back_out[depth]) \
+            and sum(used[x] for x in edges_in) == len(back_in[depth])
+
+    def descend(depth: int, v: int, w: int) -> bool:
+        """Colours for the next depth once v is mapped to w; False when
+        they show that the mapping cannot be completed."""
+        nonlocal refinements
+        colours, sizes = colourings[depth], class_sizes[depth]
+        if sizes[colours[v]] > 1:
+            refinements += 1
+            individualised = [2*c + (x != v and x != size + w)
+                              for x, c in enumerate(colours)]
+            refined = refine(individualised, view, accept=balanced)
+            if refined is None:
+                return False
+            colours, _ = refined
+            sizes = Counter(colours[:size])
+        colourings[depth+1], class_sizes[depth+1] = colours, sizes
+        return True
+
+    stack = [iter(candidates(0))]
+    try:
+        while stack:
+            depth = len(stack) - 1
+            v = order[depth]
+            if image[v] is not None:
+                used[image[v]] = False
+                image[v] = None
+            for w in stack[-1]:
+                explored += 1
+                if feasible(depth, w) and descend(depth, v, w):
+                    break
+            else:
+                stack.pop()
+                continue
+            image[v] = w
+            used[w] = True
+            if depth + 1 < size:
+                stack.append(iter(candidates(depth + 1)))
+                continue
+            yield {names[x]: target_names[image[x]] for x in range(size)}
+    finally:
+        count("mappings.candidates", explored)
+        count("mappings.refinements", refinements)
@@ -0,0 +1,78 @@
+"""Bulk extraction of edges from adjacency, weight and incidence matrices.
+
+Matrices may be lists of rows, any iterable of rows, or NumPy arrays when
+NumPy is installed; arrays are scanned with masks instead of per-cell
+Python code.
+"""
+from typing import Iterable, Iterator, Literal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+StoredData = Literal["count", "weight"]
+Row = tuple[int, list[int], list[float]]
+
+
+def is_array(matrix) -> bool:
+    return np is not None and isinstance(matrix, np.ndarray)
+
+def check_stored_data(stored_data: StoredData):
+    if stored_data not in ("count", "weight"):
+        raise TypeError(f"{stored_data} is an invalid keyword "\
+                        +"argument for stored_data")
+
+def array_mask(matrix: 'np.ndarray', stored_data: StoredData) -> 'np.ndarray':
+    if stored_data == "weight":
+        return ~np.isnan(matrix)
+    return matrix > 0
+
+def matrix_rows(matrix: Iterable[Iterable[int|float|None]],
+                stored_data: StoredData) -> Iterator[Row]:
+    """Yield `(start, ends, values)` for the edges stored in every row.
+
+    With `stored_data="weight"` a cell holds the weight of an edge and
+    missing edges are None or nan; with `"count"` it holds the number of
+    edges and anything not positive means no edge.
+    """
+    check_stored_data(stored_data)
+    if is_array(matrix):
+        matrix = np.asarray(matrix, dtype=float)
+        for start, (row, keep) in enumerate(zip(matrix, array_mask(matrix, stored_data))):
+            ends = np.flatnonzero(keep)
+            yield start, ends.tolist(), row[ends].tolist()
+        return
+
+    for start, row in enumerate(matrix):
+        if stored_data == "weight":
+            ends = [end for end, value in enumerate(row)
+                    if value is not None and value == value]
+        else:
+            ends = [end for end, value in enumerate(row) if value > 0]
+        yield start, ends, [row[end] for end in ends]
+
+def incidence_edges(matrix: Iterable[Iterable[int|float]]
+                    ) -> tuple[int, list[int], list[int], list[float]]:
+    """Number of vertices and the starts, ends and values of the edges.
+
+    Every row describes one edge: the column of its maximum is the start
+    and the column holding the negated maximum is the end.
+    """
+    if is_array(matrix):
+        matrix = np.asarray(matrix, dtype=float)
+        values = matrix.max(axis=1)
+        starts = matrix.argmax(axis=1)
+        ends = (matrix == -values[:, None]).argmax(axis=1)
+        return matrix.shape[1], starts.tolist(), ends.tolist(), values.tolist()
+
+    size = 0
+    starts, ends, values = list(), list(), list()
+    for row in matrix:
+        row = list(row)
+        value = max(row)
+        size = max(size, len(row))
+        starts.append(row.index(value))
+        ends.append(row.index(-value))
+        values.append(value)
+    return size, starts, ends, values
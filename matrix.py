@@ -1,7 +1,8 @@
 from io import StringIO
-from itertools import combinations
 import sys
 
+from my_graph import Graph
+
 
 class Matrix:
 
@@ -69,13 +70,7 @@ class Matrix:
         if self.size != __value.size:
             return False
         
-        for i, j in combinations(range(self.size), 2):
-            self.swap(i, j)
-            if self.matrix == __value.matrix:
-                return True
-            self.swap(i, j)
-        
-        return False
+        return Graph.from_adjacency(self.matrix) == Graph.from_adjacency(__value.matrix)
 
 if __name__ == '__main__':
     m = Matrix()
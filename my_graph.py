@@ -1,111 +1,295 @@
+import gc
+from array import array
 from collections import defaultdict
+from contextlib import contextmanager
 from functools import partial
 from io import StringIO
 from itertools import permutations, product
-from math import isnan
-from typing import Generator, Literal
+from math import isqrt
+from operator import itemgetter
+from types import MappingProxyType
+from typing import (Callable, Generator, Hashable, KeysView, Literal, Mapping, 
+                    Sequence)
 
-from file_parcer import read_adjacency
+from exceptions import BadFile
+from file_parcer import iter_blocks, iter_rows, read_adjacency
+from frozen_graph import Frozen_graph, is_binary
+from instrumentation import count, timed
+from isomorphism import canonical_label
+from mappings import vertex_mappings
+from matrices import StoredData, check_stored_data, incidence_edges, np
+from result_cache import memoized
+from spanning_tree import Algorithm
+
+
+@contextmanager
+def _without_gc():
+    # building a graph allocates a dict per edge; the collections those
+    # allocations trigger cannot free anything and dominate the time
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _new_edges() -> dict[str, dict[str, dict[int|float, float]]]:
+    return defaultdict(partial(defaultdict, partial(defaultdict, int)))
+
+class _Degrees(dict):
+    # a vertex that only ends edges has degree 0; reading it through the
+    # proxy returned by `degree` must not insert it
+    def __missing__(self, vertex: str) -> int:
+        return 0
+
+
+class Float_rows(Sequence):
+    """Rows of a square float64 matrix kept in one buffer; every row is a
+    memoryview into it, made when it is asked for."""
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data).cast('d')
+        self.size = isqrt(len(self.data))
+
+    def __reduce__(self):
+        return type(self), (self.data.obj,)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> memoryview:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.size))]
+        if not -self.size <= i < self.size:
+            raise IndexError("row index out of range")
+        i %= self.size
+        return self.data[i*self.size:(i+1)*self.size]
 
 
 class Graph:
+    # Derived data (degrees, minimal weights) is updated by the mutating
+    # methods below; anything computed lazily is dropped once `version`
+    # changes. Editing `edges` directly bypasses both. A thawed graph
+    # builds `edges` and the derived data from its Frozen_graph on first
+    # use (see `__getattr__`).
 
     def __init__(self):
-        self.edges = defaultdict(partial(defaultdict, partial(defaultdict, int)))
+        self.edges = _new_edges()
         self.edges: dict[str, dict[str, dict[int|float, float]]]
+        self.version = 0
+        self._degree = _Degrees()
+        self._min_weight = dict()
+        self._lazy = dict()
+        self._lazy_version = 0
     
+    def __getstate__(self) -> dict:
+        state = vars(self).copy()
+        # the fingerprint is small and saves hashing the graph again
+        state["_lazy"] = {name: value for name, value in self._lazy.items()
+                          if name == "fingerprint"}
+        return state
+
+    def __getattr__(self, name: str):
+        # only called for attributes that are not set: the dicts of a
+        # graph that `thaw` has not built yet
+        frozen = self.__dict__.get("_frozen")
+        if frozen is None or name not in ("edges", "_degree", "_min_weight"):
+            raise AttributeError(f"'Graph' object has no attribute '{name}'")
+        del self._frozen
+        self._fill(frozen)
+        return getattr(self, name)
+
+    def _changed(self):
+        self.version += 1
+
+    def _cached(self, name: str, compute: Callable[[], object]) -> object:
+        if self._lazy_version != self.version:
+            self._lazy.clear()
+            self._lazy_version = self.version
+        if name not in self._lazy:
+            self._lazy[name] = compute()
+        return self._lazy[name]
+
+    def _rebuild_caches(self):
+        self._derive()
+        self._changed()
+
+    def _derive(self):
+        # the counts of a thawed graph are floats from the CSR arrays
+        self._degree = _Degrees(
+            (start, int(sum(sum(edge.values()) for edge in adjacent.values())))
+            for start, adjacent in self.edges.items())
+        self._min_weight = {start: {end: min(edge) for end, edge in adjacent.items() if edge}
+                            for start, adjacent in self.edges.items()}
+
+    def _update_pair(self, start: str, end: str, old_count: float):
+        edge = self.edges[start][end]
+        self._degree[start] = int(self._degree[start] + sum(edge.values()) - old_count)
+        adjacent = self._min_weight.setdefault(start, dict())
+        if edge:
+            adjacent[end] = min(edge)
+        else:
+            adjacent.pop(end, None)
+        self._changed()
+
     def add_vertex(self, name: str):
         assert isinstance(name, str)
         self.edges[name] = self.edges.default_factory()
+        self._degree[name] = 0
+        self._min_weight[name] = dict()
+        self._changed()
     
     def add_edge(self, start: str, end: str, 
                  weight: int|float=0, count=1):
         assert isinstance(start, str) and isinstance(end, str)
         self.edges[start][end][weight] += count
+        self._degree[start] += count
+        adjacent = self._min_weight.setdefault(start, dict())
+        if end not in adjacent or weight < adjacent[end]:
+            adjacent[end] = weight
+        self._changed()
     
     def set_edge(self, start: str, end: str, 
                  edge: dict[int|float, float]):
         assert isinstance(start, str) and isinstance(end, str)
+        old_count = sum(self.edges[start][end].values())
         self.edges[start][end].update(edge)
+        self._update_pair(start, end, old_count)
     
+    @classmethod
+    @timed()
+    def _from_rows(cls, matrix, stored_data: StoredData) -> 'Graph':
+        # the arrays are built by NumPy for an ndarray and row by row
+        # otherwise; the dicts wait until something asks for them
+        return cls.thaw(Frozen_graph.from_matrix(matrix, stored_data))
+
     @classmethod
     def from_weights(cls, matrix: list[list[int|float|None]]) -> 'Graph':
-        graph = cls()
-        for start, row in enumerate(matrix):
-            graph.add_vertex(str(start))
-            for end, value in enumerate(row):
-                if value is None or isnan(value):
-                    continue
-                graph.add_edge(str(start), str(end), weight=value)
-        return graph
+        return cls._from_rows(matrix, "weight")
     
     @classmethod
     def from_adjacency(cls, matrix: list[list[int]]) -> 'Graph':
-        graph = cls()
-        for start, row in enumerate(matrix):
-            graph.add_vertex(str(start))
-            for end, value in enumerate(row):
-                if value <= 0:
-                    continue
-                graph.add_edge(str(start), str(end), count=value)
-        return graph
+        return cls._from_rows(matrix, "count")
     
     @classmethod
+    @timed()
     def from_incidence(cls, matrix: list[list[int|float]], 
-                       stored_data: Literal["count", "weight"]="count") -> 'Graph':
+                       stored_data: StoredData="count") -> 'Graph':
+        check_stored_data(stored_data)
+        size, starts, ends, values = incidence_edges(matrix)
         graph = cls()
-        for row in matrix:
-            value = max(row)
-            start, end = row.index(value), row.index(-value)
-            match stored_data:
-                case "count":
-                    graph.add_edge(str(start), str(end), count=value)
-                case "weight":
-                    graph.add_edge(str(start), str(end), weight=value)
-                case _:
-                    raise TypeError(f"{stored_data} is an invalid keyword "\
-                                    +"argument for stored_data")
+        for vertex in range(size):
+            graph.add_vertex(str(vertex))
+        for start, end, value in zip(starts, ends, values):
+            graph.add_edge(str(start), str(end), **{stored_data: value})
         return graph
     
+    @classmethod
+    def load(cls, path: str, how: Literal['adj', 'weight']) -> 'Graph':
+        """Graph of a matrix file, or of a binary file whatever `how` is."""
+        if is_binary(path):
+            return cls.load_binary(path)
+        if how not in ('adj', 'weight'):
+            raise ValueError(f"Unknown matrix kind: {how}")
+        stored_data = "count" if how == 'adj' else "weight"
+        try:
+            if np is None:
+                return cls._from_rows(iter_rows(path), stored_data)
+            return cls.thaw(Frozen_graph.from_blocks(iter_blocks(path), stored_data))
+        except UnicodeDecodeError as e:
+            raise BadFile(f"Файл {path} не является текстовым: {e.reason}") from e
+
+    @timed()
+    def freeze(self) -> Frozen_graph:
+        frozen = self.__dict__.get("_frozen")
+        if frozen is not None:
+            return frozen
+        return self._cached("freeze", partial(Frozen_graph.from_edges, self.edges))
+
+    def fingerprint(self) -> bytes:
+        return self._cached("fingerprint", lambda: self.freeze().fingerprint())
+
+    def known_fingerprint(self) -> bytes | None:
+        """The fingerprint when it is already computed for this version."""
+        if self._lazy_version != self.version:
+            return None
+        return self._lazy.get("fingerprint")
+
+    def remember_fingerprint(self, fingerprint: bytes, version: int):
+        """Keep a fingerprint computed elsewhere for `version` of the graph."""
+        if version == self.version:
+            self._cached("fingerprint", lambda: fingerprint)
+
+    def save_binary(self, path: str):
+        self.freeze().save(path)
+
+    @classmethod
+    @timed()
+    def load_binary(cls, path: str) -> 'Graph':
+        return cls.thaw(Frozen_graph.load(path))
+
+    @classmethod
+    def thaw(cls, frozen: Frozen_graph) -> 'Graph':
+        """Graph of `frozen`, whose dicts are built when first used."""
+        graph = cls.__new__(cls)
+        graph._frozen = frozen
+        graph.version = 0
+        graph._lazy = dict()
+        graph._lazy_version = 0
+        return graph
+
+    @timed("Graph.thaw")
+    def _fill(self, frozen: Frozen_graph):
+        self.edges = _new_edges()
+        names, offsets = frozen.names, frozen.offsets.tolist()
+        targets = frozen.targets.tolist()
+        weights, counts = frozen.weights.tolist(), frozen.counts.tolist()
+        new_edge = partial(defaultdict, int)
+        with _without_gc():
+            for start, name in enumerate(names):
+                adjacent = self.edges[name]
+                begin, end = offsets[start], offsets[start+1]
+                for target, weight, multiplicity in zip(targets[begin:end], 
+                                                        weights[begin:end],
+                                                        counts[begin:end]):
+                    end_name = names[target]
+                    if end_name in adjacent:
+                        adjacent[end_name][weight] += multiplicity
+                    else:
+                        edge = adjacent[end_name] = new_edge()
+                        edge[weight] = multiplicity
+            self._derive()
+        # the frozen form stays valid until the graph is changed
+        self._cached("freeze", lambda: frozen)
     
-    def vertices(self) -> set[str]:
-        return set(self.edges.keys())
+    def vertices(self) -> KeysView[str]:
+        return self.edges.keys()
     
-    def list_adjacent(self, vertex: str) -> set[str]:
-        return set(self.edges[vertex].keys())
+    def list_adjacent(self, vertex: str) -> KeysView[str]:
+        return self.edges.get(vertex, {}).keys()
     
-    def degree(self) -> dict[str, int]:
-        result = defaultdict(int)
-        for start in self.vertices():
-            result[start] = 0
-            for end in self.list_adjacent(start):
-                result[start] += sum(self.edges[start][end].values())
-        return result
+    def degree(self) -> Mapping[str, int]:
+        frozen = self.__dict__.get("_frozen")
+        if frozen is not None:
+            # a lazy graph: counting the arrays is cheaper than thawing
+            return MappingProxyType(self._cached("degree", lambda: _Degrees(frozen.degree())))
+        return MappingProxyType(self._degree)
+
+    def weights(self, start: str, end: str) -> KeysView[int|float]:
+        return self.edges.get(start, {}).get(end, {}).keys()
+
+    def min_weight(self, start: str, end: str) -> int|float:
+        return self._min_weight[start][end]
 
-    def weights(self, start: str, end: str) -> set[int|float]:
-        return set(self.edges[start][end].keys())
+    def min_weights(self) -> Mapping[str, dict[str, int|float]]:
+        return MappingProxyType(self._min_weight)
     
-    def min_spanning_tree(self, start: str=None):
-        if start is None:
-            start = self.vertices().pop()
-        assert start in self.vertices()
-        tree = Graph()
-        chosed = set(start)
-        while True:
-            vertex = None, None
-            min_weight = None
-            for begin in chosed:
-                for end in self.list_adjacent(begin)-chosed:
-                    weight = min(self.weights(begin, end))
-                    if min_weight is None or weight < min_weight:
-                        vertex = begin, end
-                        min_weight = weight
-            if min_weight is None:
-                break
-            chosed.add(vertex[-1])
-            tree.add_edge(*vertex, weight=min_weight)
-            tree.add_edge(*vertex[::-1], weight=min_weight)
-        return tree
+    @memoized(thaw=lambda tree: Graph.thaw(tree))
+    def min_spanning_tree(self, start: str=None, 
+                          algorithm: Algorithm="prim") -> 'Graph':
+        assert start is None or start in self.vertices()
+        return self.freeze().min_spanning_tree(start, algorithm)
     
     def rename(self, mapping: dict[str, str]):
         renamed = Graph()
@@ -116,50 +300,68 @@ class Graph:
                 new_end = mapping[end]
                 renamed.set_edge(new_start, new_end, edge)
         self.edges = renamed.edges
+        self._rebuild_caches()
     
     def all_nicknames(self) -> Generator[tuple[str], None, None]:
         yield from permutations(self.vertices())
     
     def correct_nicknames(self) -> Generator[tuple[str], None, None]:
+        degrees = self.degree()
         vertecies_by_degree = defaultdict(set)
-        for vertex, degree in self.degree().items():
+        for vertex, degree in degrees.items():
             vertecies_by_degree[degree].add(vertex)
         
-        degree_list = [self.degree()[v] for v in sorted(self.vertices())]
+        degree_list = [degrees[v] for v in sorted(self.vertices())]
         for nickname in product(*[vertecies_by_degree[d] for d in degree_list]):
             if len(set(nickname)) < len(nickname):
+                count("nicknames.discarded")
                 continue
             yield nickname
 
+    def mappings(self, other: 'Graph'=None) -> Generator[dict[str, str], None, None]:
+        """Renamings of the vertices that turn the graph into `other`
+        (its automorphisms by default), found lazily by backtracking."""
+        yield from vertex_mappings(self, self if other is None else other)
+
+    def isomorphism(self, other: 'Graph') -> dict[str, str] | None:
+        return next(self.mappings(other), None)
+
+    @memoized
+    def canonical_label(self) -> Hashable:
+        return canonical_label(self)
+
     def __eq__(self, value: 'Graph') -> bool:
-        if len(self.vertices()) != len(value.vertices()):
+        if not isinstance(value, Graph):
+            return NotImplemented
+        if len(self.freeze()) != len(value.freeze()):
             return False
+        return self.canonical_label() == value.canonical_label()
         
-        for nickname in self.correct_nicknames():
-            self.rename({i: j for i, j in zip(sorted(self.vertices()), nickname)})
-            if self.edges == value.edges:
-                return True
-        return False
-        
+    @memoized(thaw=lambda components: list(map(set, components)))
+    def strongly_connected_components(self) -> list[set[str]]:
+        return tuple(frozenset(component) 
+                     for component in self.freeze().strongly_connected_components())
+
+    @memoized(thaw=lambda reached: {name: set(names) for name, names in reached.items()})
     def reachability(self) -> dict[str, set[str]]:
-        reachable = defaultdict(set)
-        visited = set()
-        path = list(self.vertices())
-        while path:
-            current = path[-1]
-            reachable[current].add(current)
-            visited.add(current)
-
-            for child in self.list_adjacent(current):
-                if child in visited:
-                    reachable[current].update(reachable[child])
-                    continue
-                reachable[current].add(child)
-                path.append(child)
-                break
-            else:
-                path.pop()
-        return reachable
+        return {name: frozenset(names) 
+                for name, names in self.freeze().reachability().items()}
+
+    @memoized
+    def reachability_matrix(self) -> tuple[tuple[str, ...], tuple[bytes, ...]]:
+        """Rows of 0/1 bytes in sorted vertex order."""
+        frozen = self.freeze()
+        order = tuple(sorted(frozen.names))
+        if not order:
+            return order, ()
+        positions = [frozen.index[name] for name in order]
+        pick = itemgetter(*positions)
+        digits = bytes.maketrans(b"01", b"\x00\x01")
+        rows = list()
+        for bits in map(frozen.reachability_bits().__getitem__, positions):
+            row = bin(bits)[:1:-1].ljust(len(order), "0")
+            rows.append("".join(pick(row)).encode().translate(digits))
+        return order, tuple(rows)
 
     def __str__(self) -> str:
         with StringIO() as s:
@@ -170,21 +372,26 @@ class Graph:
                 print(file=s)
             return s.getvalue()
         
+    @memoized(thaw=dict)
     def dedstar(self, start: str=None) -> dict[str, float]:
-        if start is None:
-            start = self.vertices().pop()
-        distanses = defaultdict(partial(float, 'inf'))
-        distanses[start] = 0
- 
-        to_visit = self.vertices()
-        while to_visit:
-            current = min(to_visit, key=distanses.__getitem__)
-            to_visit.remove(current)
-            for child in self.list_adjacent(current) & to_visit:
-                d = distanses[current] + min(self.weights(current, child))
-                distanses[child] = min(distanses[child], d)
-        
-        return distanses
+        """Distances from `start` (the first vertex by default) to every
+        vertex, inf when unreachable; empty for an empty graph."""
+        return self.freeze().dedstar(start)
+    
+    # one bytes object crosses the pipe from a worker without building a
+    # float object per cell on the Tk thread
+    @memoized(thaw=lambda result: (result[0], Float_rows(result[1])))
+    def all_distances(self, jobs: int=None) -> tuple[tuple[str, ...], Float_rows]:
+        """Rows of distances in sorted vertex order."""
+        frozen = self.freeze()
+        order = tuple(sorted(frozen.names))
+        positions = [frozen.index[name] for name in order]
+        distances = frozen.all_distances(jobs)
+        matrix = array('d')
+        for start in positions:
+            row = distances[start]
+            matrix.extend([row[end] for end in positions])
+        return order, matrix.tobytes()
         
 
 if __name__ == '__main__':
@@ -0,0 +1,103 @@
+"""Drawing many edges into one image instead of a canvas item per edge.
+
+Segments are clipped to the image, sampled once per pixel along their
+longer axis and counted per pixel; the count picks a shade of grey, so
+crowded regions come out darker. With NumPy the clipping and sampling
+are done on whole arrays; without it every edge is limited to `SAMPLES`
+points, which keeps zoomed out views of huge graphs affordable.
+"""
+from math import ceil
+
+from matrices import np
+
+SAMPLES = 64
+CHUNK = 2**21
+
+PALETTE = ("#ffffff", "#a0a0a0", "#505050", "#000000", "#ff0000")
+VERTEX = len(PALETTE) - 1
+
+Segment = tuple[float, float, float, float]
+
+
+def clip(segment: Segment, width: int, height: int) -> Segment | None:
+    """Liang-Barsky clipping to the rectangle of the image."""
+    x1, y1, x2, y2 = segment
+    dx, dy = x2 - x1, y2 - y1
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x1), (dx, width-1 - x1), (-dy, y1), (dy, height-1 - y1)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        r = q / p
+        if p < 0:
+            t0 = max(t0, r)
+        else:
+            t1 = min(t1, r)
+    if t0 > t1:
+        return None
+    return x1 + t0*dx, y1 + t0*dy, x1 + t1*dx, y1 + t1*dy
+
+def pixel_counts(segments: list[Segment], width: int, height: int) -> list[int]:
+    counts = [0] * (width * height)
+    for segment in segments:
+        segment = clip(segment, width, height)
+        if segment is None:
+            continue
+        x1, y1, x2, y2 = segment
+        steps = min(ceil(max(abs(x2-x1), abs(y2-y1))), SAMPLES) or 1
+        dx, dy = (x2-x1) / steps, (y2-y1) / steps
+        for k in range(steps+1):
+            counts[int(y1 + k*dy) * width + int(x1 + k*dx)] += 1
+    return counts
+
+def _clip_arrays(x1, y1, x2, y2, width: int, height: int):
+    dx, dy = x2 - x1, y2 - y1
+    t0, t1 = np.zeros_like(x1), np.ones_like(x1)
+    keep = np.ones(x1.shape, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x1), (dx, width-1 - x1), (-dy, y1), (dy, height-1 - y1)):
+            r = q / p
+            t0 = np.where(p < 0, np.maximum(t0, r), t0)
+            t1 = np.where(p > 0, np.minimum(t1, r), t1)
+            keep &= ~((p == 0) & (q < 0))
+    keep &= t0 <= t1
+    x1, y1, dx, dy, t0, t1 = (a[keep] for a in (x1, y1, dx, dy, t0, t1))
+    return x1 + t0*dx, y1 + t0*dy, x1 + t1*dx, y1 + t1*dy
+
+def _array_counts(segments: list[Segment], width: int, height: int) -> 'np.ndarray':
+    x1, y1, x2, y2 = _clip_arrays(*np.array(segments, dtype=float).reshape(-1, 4).T,
+                                  width, height)
+    steps = np.maximum(np.ceil(np.maximum(abs(x2-x1), abs(y2-y1))), 1).astype(int)
+    counts = np.zeros(width * height, dtype=int)
+    block = max(1, CHUNK // (width + height + 2))
+    for start in range(0, len(steps), block):
+        part = slice(start, start + block)
+        n = steps[part] + 1
+        edge = np.repeat(np.arange(len(n)), n)
+        k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        t = k / steps[part][edge]
+        xs = (x1[part][edge] + t * (x2[part] - x1[part])[edge]).astype(int)
+        ys = (y1[part][edge] + t * (y2[part] - y1[part])[edge]).astype(int)
+        counts += np.bincount(ys * width + xs, minlength=width * height)
+    return counts
+
+def photo_data(segments: list[Segment], points: list[tuple[float, float]],
+               width: int, height: int) -> str:
+    """Pixel rows for `PhotoImage.put`: the edges in grey and a red dot
+    at every point."""
+    if np is not None and segments:
+        levels = np.minimum(_array_counts(segments, width, height), VERTEX - 1)
+    else:
+        levels = [min(c, VERTEX - 1) for c in pixel_counts(segments, width, height)]
+    for x, y in points:
+        x, y = int(x), int(y)
+        for i, j in ((x, y), (x+1, y), (x, y+1), (x+1, y+1)):
+            if 0 <= i < width and 0 <= j < height:
+                levels[j*width + i] = VERTEX
+    if np is not None:
+        colours = np.array(PALETTE)[np.asarray(levels)].tolist()
+    else:
+        colours = [PALETTE[level] for level in levels]
+    return " ".join("{" + " ".join(colours[i:i+width]) + "}"
+                    for i in range(0, width * height, width))
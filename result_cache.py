@@ -0,0 +1,155 @@
+"""Least recently used cache of algorithm results shared by all graphs.
+
+Results are keyed by the content fingerprint of the graph, so the same
+graph opened in several tabs (or loaded twice) computes every analysis
+once, and a mutated graph never sees results of its previous contents.
+A cached value is shared by every graph with the same contents, so it is
+never handed out as it is when it can be modified: callers get a copy
+made by the `thaw` of the memoized method.
+"""
+import sys
+from collections import OrderedDict
+from itertools import islice
+from functools import partial, wraps
+from threading import RLock
+from typing import Callable, Hashable
+
+from instrumentation import count, span
+
+SAMPLE = 8
+
+
+def approximate_size(value: object, limit: int=None) -> int:
+    """Bytes held by `value` and everything reachable from it.
+
+    Containers of more than SAMPLE items are estimated from their first
+    SAMPLE items, so a matrix costs as much as a few of its rows; the
+    walk stops once the total passes `limit`.
+    """
+    seen = set()
+    stack = [(value, 1.0)]
+    total = 0.0
+    while stack:
+        item, weight = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item) * weight
+        if limit is not None and total > limit:
+            break
+        if isinstance(item, dict):
+            items = list(islice(item.items(), SAMPLE))
+            items = [part for pair in items for part in pair]
+            n_items = 2 * len(item)
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            items = list(islice(item, SAMPLE))
+            n_items = len(item)
+        elif hasattr(item, '__dict__'):
+            items, n_items = [vars(item)], 1
+        else:
+            continue
+        if items:
+            scale = weight * n_items / len(items)
+            stack.extend((part, scale) for part in items)
+    return int(total)
+
+
+class Result_cache:
+
+    def __init__(self, max_bytes: int=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = RLock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: Hashable, compute: Callable[[], object]=None) -> object:
+        with self.lock:
+            if key in self.entries:
+                count("cache.hits")
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            self.misses += 1
+            count("cache.misses")
+        if compute is None:
+            raise KeyError(key)
+        value = compute()
+        self.store(key, value)
+        return value
+
+    def store(self, key: Hashable, value: object, size: int=None):
+        """Keep `value` under `key`; `size` saves measuring it again
+        when it is already known."""
+        if size is None:
+            size = approximate_size(value, self.max_bytes)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.used -= self.entries.pop(key)[1]
+            self.entries[key] = value, size
+            self.used += size
+            self.shrink(self.max_bytes)
+
+    def shrink(self, max_bytes: int):
+        with self.lock:
+            while self.used > max_bytes:
+                _, (_, size) = self.entries.popitem(last=False)
+                self.used -= size
+                self.evictions += 1
+
+    def size_of(self, key: Hashable) -> int | None:
+        with self.lock:
+            entry = self.entries.get(key)
+        return None if entry is None else entry[1]
+
+    def resize(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.shrink(max_bytes)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self.entries), "bytes": self.used,
+                "max_bytes": self.max_bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+shared_cache = Result_cache()
+
+
+def memo_key(fingerprint: bytes, method: str, args: tuple, kwargs: dict) -> Hashable:
+    return fingerprint, method, args, tuple(sorted(kwargs.items()))
+
+def same(value: object) -> object:
+    return value
+
+def memoized(method: Callable=None, *, 
+             thaw: Callable[[object], object]=same) -> Callable:
+    """Cache a Graph method in `shared_cache` by the graph fingerprint.
+
+    The cache keeps what `method` returns; every call returns
+    `thaw(value)`, which must copy the value unless it is immutable.
+    `frozen` of the wrapper gives the cached value itself.
+    """
+    if method is None:
+        return partial(memoized, thaw=thaw)
+
+    def frozen(self, *args, **kwargs):
+        with span(method.__qualname__):
+            key = memo_key(self.fingerprint(), method.__name__, args, kwargs)
+            return shared_cache.get(key, lambda: method(self, *args, **kwargs))
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return thaw(frozen(self, *args, **kwargs))
+    wrapper.frozen = frozen
+    wrapper.thaw = thaw
+    return wrapper
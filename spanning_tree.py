@@ -0,0 +1,76 @@
+"""Minimum spanning trees and forests over the arrays of a Frozen_graph.
+
+Edges are treated as undirected and every entry of the CSR arrays is a
+candidate edge, so parallel edges of different weights compete with each
+other. Both algorithms return the chosen edges as `(begin, end, weight)`
+triples of vertex ids.
+"""
+from heapq import heappop, heappush
+from typing import Literal
+
+from disjoint_set import Disjoint_set
+
+Algorithm = Literal["prim", "kruskal"]
+Edges = list[tuple[int, int, float]]
+
+
+def edge_sources(frozen) -> list[int]:
+    offsets = frozen.offsets
+    return [v for v in range(len(frozen))
+            for _ in range(offsets[v], offsets[v+1])]
+
+def prim(frozen, start: int=None) -> Edges:
+    """Heap-based Prim from `start`, or from every tree of the forest."""
+    size, targets, weights = len(frozen), frozen.targets, frozen.weights
+    neighbours = [[] for _ in range(size)]
+    for i, source in enumerate(edge_sources(frozen)):
+        target = targets[i]
+        if source != target:
+            neighbours[source].append((weights[i], target))
+            neighbours[target].append((weights[i], source))
+
+    chosed = bytearray(size)
+    tree = list()
+    roots = range(size) if start is None else (start,)
+    for root in roots:
+        if chosed[root]:
+            continue
+        heap = [(0, root, root)]
+        while heap:
+            weight, begin, end = heappop(heap)
+            if chosed[end]:
+                continue
+            chosed[end] = 1
+            if begin != end:
+                tree.append((begin, end, weight))
+            for weight, child in neighbours[end]:
+                if not chosed[child]:
+                    heappush(heap, (weight, end, child))
+    return tree
+
+def kruskal(frozen, start: int=None) -> Edges:
+    """Kruskal over the edges sorted by weight; the tree of `start` or
+    the whole forest."""
+    targets, weights = frozen.targets, frozen.weights
+    sources = edge_sources(frozen)
+    components = Disjoint_set(len(frozen))
+    tree = list()
+    for i in sorted(range(len(targets)), key=weights.__getitem__):
+        begin, end = sources[i], targets[i]
+        if components.union(begin, end):
+            tree.append((begin, end, weights[i]))
+    if start is not None:
+        root = components.find(start)
+        tree = [edge for edge in tree if components.find(edge[0]) == root]
+    return tree
+
+ALGORITHMS = {
+    "prim": prim,
+    "kruskal": kruskal,
+}
+
+def spanning_tree(frozen, start: int=None, algorithm: Algorithm="prim") -> Edges:
+    if algorithm not in ALGORITHMS:
+        raise TypeError(f"{algorithm} is an invalid keyword "\
+                        +"argument for algorithm")
+    return ALGORITHMS[algorithm](frozen, start)
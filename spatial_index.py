@@ -0,0 +1,153 @@
+"""Uniform grids over item positions and boxes for hit-testing and culling
+without Tk round-trips."""
+from collections import defaultdict
+from functools import partial
+from math import ceil, dist, floor, log2
+from typing import Hashable, Iterator
+
+
+class Grid_index:
+
+    def __init__(self, cell_size: float=40):
+        self.cell_size = cell_size
+        self.positions = dict()
+        self.cells = defaultdict(set)
+
+    def cell(self, x: float, y: float) -> tuple[int, int]:
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def move(self, item: Hashable, x: float, y: float):
+        if item in self.positions:
+            old = self.cell(*self.positions[item])
+            new = self.cell(x, y)
+            if old != new:
+                self.cells[old].discard(item)
+                if not self.cells[old]:
+                    del self.cells[old]
+                self.cells[new].add(item)
+        else:
+            self.cells[self.cell(x, y)].add(item)
+        self.positions[item] = x, y
+
+    def remove(self, item: Hashable):
+        cell = self.cell(*self.positions.pop(item))
+        self.cells[cell].discard(item)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def items_in(self, x0: float, y0: float,
+                 x1: float, y1: float) -> Iterator[Hashable]:
+        """Items whose position lies inside the rectangle."""
+        (i0, j0), (i1, j1) = self.cell(x0, y0), self.cell(x1, y1)
+        if (i1-i0+1) * (j1-j0+1) > len(self.cells):
+            cells = (items for (i, j), items in self.cells.items()
+                     if i0 <= i <= i1 and j0 <= j <= j1)
+        else:
+            cells = (self.cells.get((i, j), ()) for i in range(i0, i1+1)
+                                                for j in range(j0, j1+1))
+        for items in cells:
+            for item in items:
+                x, y = self.positions[item]
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    yield item
+
+    def nearest(self, x: float, y: float, radius: float) -> Hashable | None:
+        """Closest item no farther than `radius` from the point."""
+        candidates = self.items_in(x-radius, y-radius, x+radius, y+radius)
+        best, best_distance = None, radius
+        for item in candidates:
+            distance = dist(self.positions[item], (x, y))
+            if distance <= best_distance:
+                best, best_distance = item, distance
+        return best
+
+
+def crosses(segment: tuple[float, float, float, float],
+            x0: float, y0: float, x1: float, y1: float) -> bool:
+    """Whether the segment has a point inside the rectangle (Liang-Barsky)."""
+    sx, sy, ex, ey = segment
+    dx, dy = ex - sx, ey - sy
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, sx - x0), (dx, x1 - sx), (-dy, sy - y0), (dy, y1 - sy)):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        r = q / p
+        if p < 0:
+            t0 = max(t0, r)
+        else:
+            t1 = min(t1, r)
+        if t0 > t1:
+            return False
+    return True
+
+
+class Box_index:
+    """Grids of doubling cell sizes over item bounding boxes.
+
+    An item is kept in the finest grid whose cells are at least as large
+    as its box, in the (at most four) cells the box overlaps, so long
+    edges do not fill the fine grids and short ones do not crowd the
+    coarse cells.
+    """
+
+    def __init__(self, cell_size: float=40):
+        self.cell_size = cell_size
+        self.boxes = dict()
+        self.places = dict()
+        self.levels = defaultdict(partial(defaultdict, set))
+
+    def place(self, x0: float, y0: float, x1: float, y1: float
+              ) -> tuple[int, tuple[int, int, int, int]]:
+        """Grid level and range of cells of a box."""
+        size = max(x1-x0, y1-y0)
+        level = 0 if size <= self.cell_size else ceil(log2(size / self.cell_size))
+        side = self.cell_size * 2**level
+        return level, (floor(x0/side), floor(y0/side), floor(x1/side), floor(y1/side))
+
+    def move(self, item: Hashable, x0: float, y0: float, x1: float, y1: float):
+        """Put the item over the box with the given corners, in any order."""
+        box = min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+        place = self.place(*box)
+        if self.places.get(item) != place:
+            if item in self.places:
+                self.remove(item)
+            level, (i0, j0, i1, j1) = self.places[item] = place
+            cells = self.levels[level]
+            for i in range(i0, i1+1):
+                for j in range(j0, j1+1):
+                    cells[i, j].add(item)
+        self.boxes[item] = box
+
+    def remove(self, item: Hashable):
+        del self.boxes[item]
+        level, (i0, j0, i1, j1) = self.places.pop(item)
+        cells = self.levels[level]
+        for i in range(i0, i1+1):
+            for j in range(j0, j1+1):
+                cells[i, j].discard(item)
+                if not cells[i, j]:
+                    del cells[i, j]
+
+    def items_in(self, x0: float, y0: float,
+                 x1: float, y1: float) -> Iterator[Hashable]:
+        """Items whose box overlaps the rectangle, each once."""
+        seen = set()
+        for level, cells in self.levels.items():
+            side = self.cell_size * 2**level
+            i0, j0, i1, j1 = floor(x0/side), floor(y0/side), floor(x1/side), floor(y1/side)
+            if (i1-i0+1) * (j1-j0+1) > len(cells):
+                found = [items for (i, j), items in cells.items()
+                         if i0 <= i <= i1 and j0 <= j <= j1]
+            else:
+                found = [cells[i, j] for i in range(i0, i1+1) for j in range(j0, j1+1)
+                         if (i, j) in cells]
+            for items in found:
+                for item in items:
+                    if item in seen:
+                        continue
+                    seen.add(item)
+                    bx0, by0, bx1, by1 = self.boxes[item]
+                    if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                        yield item
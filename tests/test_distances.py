@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from all_pairs import all_pairs
+from my_graph import Graph
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def test_dedstar_of_empty_graph():
+    assert Graph().dedstar() == {}
+
+def test_dedstar_distances_are_floats():
+    graph = Graph()
+    for name in "abc":
+        graph.add_vertex(name)
+    graph.add_edge("a", "b", weight=2)
+    distances = graph.dedstar("a")
+    assert distances == {"a": 0.0, "b": 2.0, "c": float("inf")}
+    assert all(isinstance(distance, float) for distance in distances.values())
+
+def test_negative_cycle_strategies_agree():
+    graph = Graph.load(EXAMPLES / "test3.txt", "weight")
+    names, rows = graph.all_distances(1)
+    assert [list(row) for row in rows] == [
+        [graph.dedstar(start)[end] for end in names] for start in names]
+    frozen = graph.freeze()
+    assert all_pairs(frozen, 1, "floyd_warshall") == all_pairs(frozen, 1, "dijkstra")
+
+def test_frozen_dedstar_matches_graph():
+    graph = Graph()
+    graph.add_vertex("a")
+    graph.add_edge("a", "b", weight=3)
+    graph.add_edge("c", "a", weight=1)
+    expected = {"a": 0.0, "b": 3.0, "c": float("inf")}
+    assert graph.dedstar("a") == graph.freeze().dedstar("a") == expected
+    assert type(graph.freeze().dedstar("a")) is dict
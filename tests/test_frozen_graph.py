@@ -0,0 +1,105 @@
+from array import array
+
+import pytest
+
+from exceptions import BadFile
+from frozen_graph import HEADER, MAGIC, Frozen_graph
+from my_graph import Graph
+
+
+def multigraph() -> Graph:
+    graph = Graph()
+    for name in ("0", "вершина", "ноль", "☃"):
+        graph.add_vertex(name)
+    graph.add_edge("0", "вершина", weight=1)
+    graph.add_edge("0", "вершина", weight=1)
+    graph.add_edge("0", "вершина", weight=2.5)
+    graph.add_edge("вершина", "☃", weight=3, count=4)
+    graph.add_edge("☃", "☃", weight=0)
+    return graph
+
+def save(tmp_path, frozen: Frozen_graph):
+    path = tmp_path / "graph.gpg"
+    frozen.save(path)
+    return path
+
+
+def test_round_trip_keeps_multi_edges_and_names(tmp_path):
+    graph = multigraph()
+    loaded = Graph.load_binary(save(tmp_path, graph.freeze()))
+    assert loaded.edges == graph.edges
+    assert dict(loaded.degree()) == dict(graph.degree())
+    assert loaded.fingerprint() == graph.fingerprint()
+
+def test_round_trip_of_empty_graph(tmp_path):
+    loaded = Frozen_graph.load(save(tmp_path, Graph().freeze()))
+    assert len(loaded) == 0
+    assert loaded.edges() == {}
+
+def test_load_is_chosen_by_magic(tmp_path):
+    path = save(tmp_path, multigraph().freeze())
+    assert Graph.load(path, "adj").edges == multigraph().edges
+
+@pytest.mark.parametrize("size", [0, 2, HEADER.size - 1, HEADER.size + 3, -8])
+def test_truncated_file(tmp_path, size):
+    path = save(tmp_path, multigraph().freeze())
+    data = path.read_bytes()
+    path.write_bytes(data[:size % len(data)])
+    with pytest.raises(BadFile):
+        Frozen_graph.load(path)
+
+def test_names_that_are_not_utf8(tmp_path):
+    path = tmp_path / "graph.gpg"
+    names = b"\xff\xfe"
+    path.write_bytes(HEADER.pack(MAGIC, 1, 0, len(names)) + names + bytes(6) 
+                     + bytes(16))
+    with pytest.raises(BadFile):
+        Frozen_graph.load(path)
+
+def test_fewer_names_than_vertices(tmp_path):
+    path = tmp_path / "graph.gpg"
+    names = b"a\0b"
+    path.write_bytes(HEADER.pack(MAGIC, 3, 0, len(names)) + names + bytes(5) 
+                     + bytes(32))
+    with pytest.raises(BadFile):
+        Frozen_graph.load(path)
+
+def test_whole_graph_results_do_not_thaw():
+    graph = multigraph()
+    lazy = Graph.thaw(graph.freeze())
+    graph.add_vertex("1")
+    other = Graph.thaw(graph.freeze())
+    lazy.degree(), lazy.all_distances(1), lazy.reachability_matrix()
+    assert lazy != other
+    assert "edges" not in vars(lazy) and "edges" not in vars(other)
+
+def test_degrees_are_integers_with_zero_default():
+    graph = Graph()
+    graph.add_vertex("a")
+    graph.add_edge("a", "b", weight=1, count=2)
+    lazy = Graph.thaw(graph.freeze())
+    thawed = Graph.thaw(graph.freeze())
+    thawed.add_vertex("c")
+    for degrees in graph.degree(), lazy.degree(), thawed.degree():
+        assert degrees["a"] == 2 and type(degrees["a"]) is int
+        assert degrees["b"] == 0
+    assert "b" not in graph.degree()
+
+def rows_file(tmp_path, offsets: list[int], targets: list[int]):
+    path = tmp_path / "graph.gpg"
+    names = b"a\0b"
+    arrays = array('q', offsets + targets).tobytes() + bytes(16 * len(targets))
+    path.write_bytes(HEADER.pack(MAGIC, 2, len(targets), len(names)) + names 
+                     + bytes(5) + arrays)
+    return path
+
+@pytest.mark.parametrize("offsets, targets", [
+    ([0, 1, 1], [7]), ([0, 1, 1], [-1]), ([1, 1, 1], [0]), 
+    ([0, 2, 1], [0]), ([0, 1, 0], [0]), ([0, 0, 2], [0])])
+def test_rows_that_do_not_fit(tmp_path, offsets, targets):
+    with pytest.raises(BadFile):
+        Frozen_graph.load(rows_file(tmp_path, offsets, targets))
+
+def test_valid_rows(tmp_path):
+    loaded = Frozen_graph.load(rows_file(tmp_path, [0, 1, 2], [1, 0]))
+    assert loaded.edges() == {"a": {"b": {0.0: 0.0}}, "b": {"a": {0.0: 0.0}}}
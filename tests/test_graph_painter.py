@@ -0,0 +1,20 @@
+from pathlib import Path
+
+import pytest
+
+from graph_painter import main, records
+from my_graph import Graph
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def test_spanning_tree_edges_are_written_once():
+    graph = Graph.load(EXAMPLES / "weighted1.txt", "weight")
+    _, rows = records(graph, "spanning_tree", None, "prim")
+    pairs = [frozenset((start, end)) for start, end, _ in rows]
+    assert len(pairs) == len(set(pairs)) == len(graph.vertices()) - 1
+
+@pytest.mark.parametrize("jobs", ["0", "-2", "two"])
+def test_jobs_must_be_positive(jobs):
+    with pytest.raises(SystemExit):
+        main(["analyze", str(EXAMPLES / "weighted1.txt"), "--jobs", jobs])
@@ -0,0 +1,41 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from my_graph import Graph
+from result_cache import shared_cache
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def loaded() -> Graph:
+    return Graph.load(EXAMPLES / "weighted1.txt", "weight")
+
+
+def test_changing_a_result_does_not_change_the_cache():
+    shared_cache.clear()
+    graph, copy = loaded(), loaded()
+
+    tree = graph.min_spanning_tree()
+    tree.add_edge("0", "6", weight=1)
+    assert graph.min_spanning_tree() is not tree
+    assert "6" not in graph.min_spanning_tree().list_adjacent("0")
+
+    graph.reachability()["0"].clear()
+    assert copy.reachability()["0"] == set(copy.vertices())
+
+    graph.dedstar("0")["1"] = -1
+    assert copy.dedstar("0")["1"] == 7
+
+    graph.strongly_connected_components()[0].clear()
+    assert copy.strongly_connected_components() == [set(copy.vertices())]
+
+def test_matrices_are_immutable():
+    names, rows = loaded().all_distances(1)
+    assert isinstance(names, tuple) and len(rows) == len(names)
+    with pytest.raises(TypeError):
+        rows[0][0] = 1.0
+    assert pickle.loads(pickle.dumps(rows))[-1].tolist() == rows[-1].tolist()
+    names, rows = loaded().reachability_matrix()
+    assert isinstance(rows, tuple) and all(isinstance(row, bytes) for row in rows)
@@ -1,5 +1,12 @@
+import os
 import tkinter as tk
-from  tkinter import ttk
+from functools import partial
+from  tkinter import filedialog, ttk
+from typing import Callable, Sequence
+
+from export import write_binary, write_csv
+from instrumentation import Recorder, count, recorder, timed
+from workers import Job, runner
 
 class Table_window(tk.Toplevel):
 
@@ -18,11 +25,218 @@ class Table_window(tk.Toplevel):
         
         for row in table[1:]:
             tree.insert("", tk.END, values=row)
+        count("widgets.table_rows", len(table) - 1)
         return tree
 
+class Matrix_window(tk.Toplevel):
+    """Square matrix shown as a grid that only draws the visible cells.
+
+    The cells are a fixed pool of canvas texts, refilled from `matrix`
+    whenever the view scrolls, so opening and scrolling cost the same
+    for any size of the matrix.
+    """
+    cell_width, cell_height = 60, 22
+
+    def __init__(self, master, names: Sequence[str], matrix: Sequence[Sequence],
+                 title: str, cell: Callable[[object], object]=str):
+        super().__init__(master)
+        self.title(title)
+        self.names, self.matrix, self.cell = names, matrix, cell
+        self.top = self.left = 0
+        self.n_rows = self.n_columns = 0
+        self.items = list()
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0,
+                                width=min(len(names)+1, 12) * self.cell_width,
+                                height=min(len(names)+1, 20) * self.cell_height)
+        self.vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.xview)
+        buttons = tk.Frame(self)
+        tk.Button(buttons, text="Сохранить CSV", command=self.export_csv).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Сохранить двоичный",
+                  command=self.export_binary).pack(side=tk.LEFT)
+
+        self.canvas.grid(row=0, column=0, sticky=tk.NSEW)
+        self.vbar.grid(row=0, column=1, sticky=tk.NS)
+        self.hbar.grid(row=1, column=0, sticky=tk.EW)
+        buttons.grid(row=2, column=0, columnspan=2, sticky=tk.W)
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", self.resize)
+        self.canvas.bind("<MouseWheel>",
+                         lambda event: self.yview("scroll", -event.delta // 120, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self.yview("scroll", -3, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.yview("scroll", 3, "units"))
+
+    def resize(self, event):
+        n_rows = max(1, event.height // self.cell_height - 1)
+        n_columns = max(1, event.width // self.cell_width - 1)
+        if (n_rows, n_columns) == (self.n_rows, self.n_columns):
+            return
+        self.n_rows, self.n_columns = n_rows, n_columns
+        self.canvas.delete("all")
+        w, h = self.cell_width, self.cell_height
+        self.items = [[self.canvas.create_text((c+0.5)*w, (r+0.5)*h,
+                                               font=("TkDefaultFont", 9, "bold")
+                                               if r == 0 or c == 0 else None)
+                       for c in range(n_columns+1)] for r in range(n_rows+1)]
+        count("widgets.matrix_cells", (n_rows+1) * (n_columns+1))
+        self.canvas.create_line(0, h, (n_columns+1)*w, h)
+        self.canvas.create_line(w, 0, w, (n_rows+1)*h)
+        self.top, self.left = self.clamp(self.top, self.n_rows), self.clamp(self.left, self.n_columns)
+        self.redraw()
+
+    def clamp(self, first: int, page: int) -> int:
+        return max(0, min(first, len(self.names) - page))
+
+    def redraw(self):
+        names, size = self.names, len(self.names)
+        text = self.canvas.itemconfigure
+        for c in range(1, self.n_columns+1):
+            j = self.left + c - 1
+            text(self.items[0][c], text=names[j] if j < size else "")
+        for r in range(1, self.n_rows+1):
+            i = self.top + r - 1
+            items = self.items[r]
+            if i >= size:
+                for item in items:
+                    text(item, text="")
+                continue
+            text(items[0], text=names[i])
+            row = self.matrix[i]
+            for c in range(1, self.n_columns+1):
+                j = self.left + c - 1
+                text(items[c], text=self.cell(row[j]) if j < size else "")
+        size = max(size, 1)
+        self.vbar.set(self.top / size, min(1, (self.top + self.n_rows) / size))
+        self.hbar.set(self.left / size, min(1, (self.left + self.n_columns) / size))
+
+    def scroll(self, first: int, page: int, *args) -> int:
+        match args:
+            case ("moveto", fraction):
+                first = int(float(fraction) * len(self.names))
+            case ("scroll", amount, "pages"):
+                first += int(amount) * page
+            case ("scroll", amount, _):
+                first += int(amount)
+        return self.clamp(first, page)
+
+    def yview(self, *args):
+        self.top = self.scroll(self.top, self.n_rows, *args)
+        self.redraw()
+
+    def xview(self, *args):
+        self.left = self.scroll(self.left, self.n_columns, *args)
+        self.redraw()
+
+    def export_csv(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".csv")
+        if path:
+            self.export(write_csv, path, self.names, self.matrix)
+
+    def export_binary(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".npy")
+        if path:
+            self.export(write_binary, path, self.matrix)
+
+    def export(self, writer: Callable, path: str, *args):
+        job = runner.submit(self, writer, path, *args, on_done=lambda result: None,
+                            group=f"export-{id(self)}", kind="isolated")
+        job.listeners.append(partial(self.discard_partial, path))
+        show_progress(self, job, "Сохранение")
+
+    def discard_partial(self, path: str, job: Job):
+        if job.cancelled and os.path.exists(path):
+            os.remove(path)
+
+
+class Progress_window(tk.Toplevel):
+
+    def __init__(self, master, job: Job, title: str):
+        super().__init__(master)
+        self.title(title)
+        self.resizable(False, False)
+
+        bar = ttk.Progressbar(self, mode="indeterminate", length=200)
+        bar.pack(padx=10, pady=10)
+        bar.start(15)
+        tk.Button(self, text="Отмена", command=job.cancel).pack(pady=(0, 10))
+        job.listeners.append(lambda job: self.destroy())
+
+class Stats_window(tk.Toplevel):
+    """The last operations recorded by the instrumentation and the
+    counter totals, refreshed while the window is open."""
+
+    def __init__(self, master, recorder: Recorder, rows: int=50, interval: int=1000):
+        super().__init__(master)
+        self.title("Статистика")
+        self.recorder = recorder
+        self.rows = rows
+        self.interval = interval
+
+        columns = ("name", "ms", "counters")
+        self.tree = ttk.Treeview(self, show="headings", columns=columns, height=20)
+        for column, text, width in zip(columns, ("Операция", "мс", "Счётчики"),
+                                       (220, 80, 400)):
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.totals = tk.Label(self, justify=tk.LEFT, anchor=tk.W)
+        self.totals.pack(fill=tk.X)
+
+        buttons = tk.Frame(self)
+        buttons.pack(fill=tk.X)
+        tk.Button(buttons, text="Очистить", command=self.clear).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Сохранить JSON",
+                  command=self.export_json).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Сохранить Chrome trace",
+                  command=self.export_trace).pack(side=tk.LEFT)
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        snapshot = self.recorder.snapshot()
+        self.tree.delete(*self.tree.get_children())
+        for record in reversed(snapshot["spans"][-self.rows:]):
+            counters = ", ".join(f"{k}={v}" for k, v in sorted(record["counters"].items()))
+            self.tree.insert("", tk.END, values=(record["name"],
+                                                 f"{record['duration']*1000:.1f}",
+                                                 counters))
+        state = "" if self.recorder.enabled else "Запись выключена\n"
+        self.totals.config(text=state + "\n".join(
+            f"{k}: {v}" for k, v in sorted(snapshot["counters"].items())))
+        self.after(self.interval, self.refresh)
+
+    def clear(self):
+        self.recorder.clear()
+
+    def export_json(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json")
+        if path:
+            self.recorder.export_json(path)
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json")
+        if path:
+            self.recorder.export_chrome_trace(path)
+
+@timed("widgets.show_table")
 def show_table(table: list[list[int]], title=''):
     Table_window(None, table, title)
 
+def show_matrix(master, names: Sequence[str], matrix: Sequence[Sequence],
+                title='', cell: Callable[[object], object]=str):
+    Matrix_window(master, names, matrix, title, cell)
+
+def show_progress(master, job: Job | None, title=''):
+    if job is not None:
+        Progress_window(master, job, title)
+
+def show_stats(master):
+    Stats_window(master, recorder)
+
 if __name__ == '__main__':
     from random import *
     root = tk.Tcl()
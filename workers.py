@@ -0,0 +1,244 @@
+"""Running graph analyses off the Tk main loop.
+
+Jobs go to a process pool (or a thread pool when the work releases the
+GIL or is cheap to share) and their futures are polled with `after()`, so
+callbacks always run on the Tk thread. Jobs that the user may cancel run
+in a process of their own ("isolated"), which cancelling stops: it gets
+SIGTERM and `GRACE` seconds to release what it holds outside its memory
+(shared memory, files) before it is killed. Jobs may
+belong to a group: a new job in a group cancels the previous one, e.g. a
+second isomorphism check supersedes the first.
+"""
+import atexit
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Literal
+
+from result_cache import approximate_size, memo_key, shared_cache
+
+Kind = Literal["process", "thread", "isolated"]
+
+GRACE = 2.0
+
+
+def call_method(graph, method: str, args: tuple) -> tuple[bytes, object, int]:
+    """Cached value of a memoized Graph method with the fingerprint of
+    the graph and the size of the value, both computed in the worker so
+    that the Tk thread does not hash or measure anything."""
+    result = getattr(type(graph), method).frozen(graph, *args)
+    fingerprint = graph.fingerprint()
+    size = shared_cache.size_of(memo_key(fingerprint, method, args, {}))
+    if size is None:
+        size = approximate_size(result, shared_cache.max_bytes)
+    return fingerprint, result, size
+
+
+class Cancelled(BaseException):
+    """Raised in an isolated job on SIGTERM, so that its `finally` blocks
+    run before the process exits."""
+
+_job = None
+
+def _cancelled(signum, frame):
+    if os.getpid() != _job:
+        # a pool worker forked by the job: it holds nothing to release
+        os._exit(1)
+    raise Cancelled()
+
+def _run_isolated(connection, function: Callable, args: tuple):
+    global _job
+    _job = os.getpid()
+    signal.signal(signal.SIGTERM, _cancelled)
+    if hasattr(os, "setpgrp"):
+        # a group of its own, so that stopping it also stops the pools it starts
+        os.setpgrp()
+    try:
+        outcome = True, function(*args)
+    except Cancelled:
+        connection.close()
+        return
+    except BaseException as error:
+        outcome = False, error
+    try:
+        connection.send(outcome)
+    except Exception as error:
+        connection.send((False, error))
+    connection.close()
+
+
+class Process_future(Future):
+    """Future of a call made in a process of its own; `cancel` stops the
+    process, and on POSIX the processes it has started."""
+
+    def __init__(self, function: Callable, args: tuple):
+        super().__init__()
+        self.connection, sender = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(target=_run_isolated,
+                                               args=(sender, function, args))
+        self.process.start()
+        sender.close()
+
+    def done(self) -> bool:
+        if not super().done() and self.connection.poll():
+            try:
+                succeeded, value = self.connection.recv()
+            except EOFError:
+                self.process.join()
+                succeeded, value = False, ChildProcessError(
+                    f"Рабочий процесс завершился с кодом {self.process.exitcode}")
+            self.process.join()
+            self.connection.close()
+            if succeeded:
+                self.set_result(value)
+            else:
+                self.set_exception(value)
+        return super().done()
+
+    def cancel(self) -> bool:
+        if super().done():
+            return super().cancelled()
+        self.signal(signal.SIGTERM)
+        self.process.join(GRACE)
+        if self.process.is_alive():
+            self.signal(getattr(signal, "SIGKILL", None))
+            self.process.join()
+        self.connection.close()
+        return super().cancel()
+
+    def signal(self, number: int | None):
+        try:
+            os.killpg(self.process.pid, number)
+        except (AttributeError, TypeError, ProcessLookupError, PermissionError):
+            # no process groups, or the process has not made its own yet
+            if number == signal.SIGTERM:
+                self.process.terminate()
+            else:
+                self.process.kill()
+
+
+class Job:
+
+    def __init__(self, future: Future, on_done: Callable[[object], None],
+                 on_error: Callable[[BaseException], None]=None):
+        self.future = future
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+        self.listeners = list()
+
+    def cancel(self):
+        self.cancelled = True
+        self.future.cancel()
+        self.finish()
+
+    def finish(self):
+        for listener in self.listeners:
+            listener(self)
+        self.listeners.clear()
+
+    def deliver(self):
+        if self.cancelled:
+            return
+        error = self.future.exception()
+        if error is None:
+            self.on_done(self.future.result())
+        elif self.on_error is not None:
+            self.on_error(error)
+        else:
+            raise error
+
+
+class Job_runner:
+
+    def __init__(self, workers: int=None, interval: int=20):
+        self.workers = workers
+        self.interval = interval
+        self.executors = dict()
+        self.groups = dict()
+        self.isolated = set()
+
+    def executor(self, kind: Kind) -> Executor:
+        if kind not in self.executors:
+            pool = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+            self.executors[kind] = pool(self.workers)
+        return self.executors[kind]
+
+    def submit(self, widget, function: Callable, *args,
+               on_done: Callable[[object], None],
+               on_error: Callable[[BaseException], None]=None,
+               group: str=None, kind: Kind="process") -> Job:
+        """Run `function(*args)` in a pool and pass the result to `on_done`
+        from the Tk loop of `widget`."""
+        if group in self.groups:
+            self.groups.pop(group).cancel()
+        if kind == "isolated":
+            future = Process_future(function, args)
+        else:
+            future = self.executor(kind).submit(function, *args)
+        job = Job(future, on_done, on_error)
+        if kind == "isolated":
+            self.isolated.add(job)
+            job.listeners.append(self.isolated.discard)
+        if group is not None:
+            self.groups[group] = job
+            job.listeners.append(lambda job: self.forget(group, job))
+        self.poll(widget, job)
+        return job
+
+    def analyse(self, widget, graph, method: str, *args,
+                on_done: Callable[[object], None], **kwargs) -> Job | None:
+        """Call a memoized Graph method in a pool; answer from the shared
+        cache right away when the result is already known. The cache is
+        only looked at when the graph fingerprint is known: hashing a
+        large graph is left to the worker."""
+        thaw = getattr(type(graph), method).thaw
+        fingerprint = graph.known_fingerprint()
+        if fingerprint is not None:
+            key = memo_key(fingerprint, method, args, {})
+            if key in shared_cache:
+                on_done(thaw(shared_cache.get(key)))
+                return None
+
+        version = graph.version
+        def store(measured: tuple[bytes, object, int]):
+            fingerprint, result, size = measured
+            graph.remember_fingerprint(fingerprint, version)
+            shared_cache.store(memo_key(fingerprint, method, args, {}), result, size)
+            on_done(thaw(result))
+        return self.submit(widget, call_method, graph, method, args,
+                           on_done=store, **kwargs)
+
+    def forget(self, group: str, job: Job):
+        if self.groups.get(group) is job:
+            del self.groups[group]
+
+    def poll(self, widget, job: Job):
+        if job.cancelled:
+            return
+        if not widget.winfo_exists():
+            job.cancel()
+            return
+        if not job.future.done():
+            widget.after(self.interval, self.poll, widget, job)
+            return
+        job.finish()
+        job.deliver()
+
+    def shutdown(self):
+        """Stop everything, running work included, without waiting."""
+        for job in list(self.isolated):
+            job.cancel()
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors.clear()
+        # the pool workers would otherwise finish their current call
+        # before the interpreter may exit
+        for process in multiprocessing.active_children():
+            process.terminate()
+
+
+runner = Job_runner()
+# runs before multiprocessing joins the processes still working
+atexit.register(runner.shutdown)